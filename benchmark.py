@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+from __future__ import division, print_function
+
+import sys
+import subprocess
+from optparse import OptionParser
+
+# Statements timed in a fresh interpreter, each after the previous ones
+STAGES = [
+    ('import gym', 'import gym'),
+    ('import gym_minigrid', 'import gym_minigrid'),
+    ('gym.make', 'gym.make(%r)'),
+]
+
+TIMER = '''
+import time
+times = []
+for stmt in %r:
+    start = time.perf_counter()
+    exec(stmt)
+    times.append(time.perf_counter() - start)
+print(' '.join(str(t) for t in times))
+print(int('PyQt5' in __import__('sys').modules))
+'''
+
+def main():
+    parser = OptionParser()
+    parser.add_option(
+        "-e",
+        "--env-name",
+        dest="env_name",
+        help="gym environment to make",
+        default='MiniGrid-DoorKey-8x8-v0'
+    )
+    parser.add_option(
+        "-n",
+        "--num-runs",
+        dest="num_runs",
+        type="int",
+        help="number of interpreters to time",
+        default=10
+    )
+    (options, args) = parser.parse_args()
+
+    stmts = [stmt.replace('%r', repr(options.env_name)) for _, stmt in STAGES]
+
+    runs = []
+    for i in range(options.num_runs):
+        out = subprocess.check_output(
+            [sys.executable, '-c', TIMER % (stmts,)],
+            stderr=subprocess.DEVNULL
+        ).decode().split('\n')
+        runs.append([float(t) for t in out[0].split()])
+        qt_loaded = out[1] == '1'
+
+    # Report the median time of each stage
+    for idx, (name, _) in enumerate(STAGES):
+        times = sorted(run[idx] for run in runs)
+        print('%-20s %7.1f ms' % (name, 1000 * times[len(times) // 2]))
+
+    print('PyQt5 loaded: %s' % qt_loaded)
+
+if __name__ == "__main__":
+    main()
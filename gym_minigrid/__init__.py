@@ -1,5 +1,22 @@
-# Import the envs module so that envs register themselves
-import gym_minigrid.envs
+import sys
+import types
+import importlib
 
-# Import wrappers so it's accessible when installing with pip
-import gym_minigrid.wrappers
+# Register the environments, their modules are only imported when they
+# are made
+import gym_minigrid.register
+
+class _PackageModule(types.ModuleType):
+    """
+    Module type importing the envs and wrappers modules on first access,
+    so that they remain accessible when installing with pip. A
+    module-level __getattr__ would do the same, but needs Python 3.7.
+    """
+
+    def __getattr__(self, name):
+        if name in ('envs', 'wrappers'):
+            return importlib.import_module('gym_minigrid.' + name)
+
+        raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+
+sys.modules[__name__].__class__ = _PackageModule
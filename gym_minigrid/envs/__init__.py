@@ -1,20 +1,55 @@
-from gym_minigrid.envs.empty import *
-from gym_minigrid.envs.doorkey import *
-from gym_minigrid.envs.multiroom import *
-from gym_minigrid.envs.fetch import *
-from gym_minigrid.envs.gotoobject import *
-from gym_minigrid.envs.gotodoor import *
-from gym_minigrid.envs.putnear import *
-from gym_minigrid.envs.lockedroom import *
-from gym_minigrid.envs.keycorridor import *
-from gym_minigrid.envs.unlock import *
-from gym_minigrid.envs.unlockpickup import *
-from gym_minigrid.envs.blockedunlockpickup import *
-from gym_minigrid.envs.playground_v0 import *
-from gym_minigrid.envs.redbluedoors import *
-from gym_minigrid.envs.obstructedmaze import *
-from gym_minigrid.envs.memory import *
-from gym_minigrid.envs.fourrooms import *
-from gym_minigrid.envs.crossing import *
-# from gym_minigrid.envs.dynamicobstacles import *
-# from gym_minigrid.envs.distshift import *
\ No newline at end of file
+import sys
+import types
+import importlib
+
+# Modules defining the environments. They are imported on first access to
+# one of their names, so that making an environment only imports its own
+# module.
+ENV_MODULES = [
+    'empty',
+    'doorkey',
+    'multiroom',
+    'fetch',
+    'gotoobject',
+    'gotodoor',
+    'putnear',
+    'lockedroom',
+    'keycorridor',
+    'unlock',
+    'unlockpickup',
+    'blockedunlockpickup',
+    'playground_v0',
+    'redbluedoors',
+    'obstructedmaze',
+    'memory',
+    'fourrooms',
+    'crossing',
+    # 'dynamicobstacles',
+    # 'distshift',
+]
+
+def _modules():
+    for name in ENV_MODULES:
+        yield importlib.import_module('gym_minigrid.envs.' + name)
+
+class _EnvsModule(types.ModuleType):
+    """
+    Module type resolving the names of the environment modules lazily.
+    A module-level __getattr__ would do the same, but needs Python 3.7.
+    """
+
+    def __getattr__(self, name):
+        # Names exported by all the modules, for star imports
+        if name == '__all__':
+            return sorted(set(
+                attr for module in _modules() for attr in vars(module)
+                if not attr.startswith('_')
+            ))
+
+        for module in _modules():
+            if name in vars(module):
+                return vars(module)[name]
+
+        raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+
+sys.modules[__name__].__class__ = _EnvsModule
@@ -1,5 +1,4 @@
 from gym_minigrid.minigrid import *
-from gym_minigrid.register import register
 
 class FetchEnv(MiniGridEnv):
     """
@@ -176,36 +175,3 @@ class FetchEnvFixed5x5N3_2nd(FetchEnvFixed):
 class FetchEnvFixed5x5N3_1st(FetchEnvFixed):
     def __init__(self):
         super().__init__(size=5, numObjs=3, target_id=1)
-
-
-register(
-    id='MiniGrid-Fetch-5x5-N2-v0',
-    entry_point='gym_minigrid.envs:FetchEnv5x5N2'
-)
-
-register(
-    id='MiniGrid-Fetch-5x5-N3-v0',
-    entry_point='gym_minigrid.envs:FetchEnv5x5N3'
-)
-
-register(
-    id='MiniGrid-Fetch-6x6-N2-v0',
-    entry_point='gym_minigrid.envs:FetchEnv6x6N2'
-)
-
-register(
-    id='MiniGrid-FixedFetch-5x5-N3-1st-v0',
-    entry_point='gym_minigrid.envs:FetchEnvFixed5x5N3_1st'
-)
-
-register(
-    id='MiniGrid-FixedFetch-5x5-N3-2nd-v0',
-    entry_point='gym_minigrid.envs:FetchEnvFixed5x5N3_2nd'
-)
-
-register(
-    id='MiniGrid-Fetch-8x8-N3-v0',
-    entry_point='gym_minigrid.envs:FetchEnv'
-)
-
-
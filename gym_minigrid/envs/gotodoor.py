@@ -1,5 +1,4 @@
 from gym_minigrid.minigrid import *
-from gym_minigrid.register import register
 
 class GoToDoorEnv(MiniGridEnv):
     """
@@ -87,18 +86,3 @@ class GoToDoor8x8Env(GoToDoorEnv):
 class GoToDoor6x6Env(GoToDoorEnv):
     def __init__(self):
         super().__init__(size=6)
-
-register(
-    id='MiniGrid-GoToDoor-5x5-v0',
-    entry_point='gym_minigrid.envs:GoToDoorEnv'
-)
-
-register(
-    id='MiniGrid-GoToDoor-6x6-v0',
-    entry_point='gym_minigrid.envs:GoToDoor6x6Env'
-)
-
-register(
-    id='MiniGrid-GoToDoor-8x8-v0',
-    entry_point='gym_minigrid.envs:GoToDoor8x8Env'
-)
@@ -1,5 +1,4 @@
 from gym_minigrid.minigrid import *
-from gym_minigrid.register import register
 
 class MemoryEnv(MiniGridEnv):
     """
@@ -103,52 +102,27 @@ class MemoryS17Random(MemoryEnv):
     def __init__(self, seed=None):
         super().__init__(seed=seed, size=17, random_length=True)
 
-register(
-    id='MiniGrid-MemoryS17Random-v0',
-    entry_point='gym_minigrid.envs:MemoryS17Random',
-)
 
 class MemoryS13Random(MemoryEnv):
     def __init__(self, seed=None):
         super().__init__(seed=seed, size=13, random_length=True)
 
-register(
-    id='MiniGrid-MemoryS13Random-v0',
-    entry_point='gym_minigrid.envs:MemoryS13Random',
-)
 
 class MemoryS13(MemoryEnv):
     def __init__(self, seed=None):
         super().__init__(seed=seed, size=13)
 
-register(
-    id='MiniGrid-MemoryS13-v0',
-    entry_point='gym_minigrid.envs:MemoryS13',
-)
 
 class MemoryS11(MemoryEnv):
     def __init__(self, seed=None):
         super().__init__(seed=seed, size=11)
 
-register(
-    id='MiniGrid-MemoryS11-v0',
-    entry_point='gym_minigrid.envs:MemoryS11',
-)
 
 class MemoryS9(MemoryEnv):
     def __init__(self, seed=None):
         super().__init__(seed=seed, size=9)
 
-register(
-    id='MiniGrid-MemoryS9-v0',
-    entry_point='gym_minigrid.envs:MemoryS9',
-)
 
 class MemoryS7(MemoryEnv):
     def __init__(self, seed=None):
         super().__init__(seed=seed, size=7)
-
-register(
-    id='MiniGrid-MemoryS7-v0',
-    entry_point='gym_minigrid.envs:MemoryS7',
-)
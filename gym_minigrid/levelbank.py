@@ -0,0 +1,193 @@
+import os
+import pickle
+import numpy as np
+from .minigrid import Grid
+
+# Environment attributes which are the same for every level, and so are
+# not stored in the bank
+CONFIG_ATTRS = frozenset([
+    'spec', 'actions', 'action_space', 'observation_space', 'reward_range'
+])
+
+class LevelBank:
+    """
+    Levels generated ahead of time for a range of seeds, and stored on
+    disk so that they can be loaded instead of generated.
+
+    A bank is a directory holding the grid planes of all levels in one
+    memory-mapped array, the state of the random number generator after
+    generation in another, and the rest of each level state (start pose,
+    world objects and level-specific attributes) in a memory-mapped array
+    of pickled records. Mission strings are stored once and referred to
+    by id. Loading level k only reads the data of that level.
+
+    Loading the level of a seed leaves the environment in the state that
+    seeding it with that seed and calling reset would, provided that
+    matches() holds. Version 1 generators avoid the starting position of
+    the level before (see MiniGridEnv.gen_version), so their levels also
+    depend on it. Levels are generated one after the other in bank order,
+    starting from the state of the environment given to generate, and
+    the starting position each one was generated after is recorded.
+    Levels of version 2 generators only depend on their seed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        index = np.load(os.path.join(path, 'index.npz'))
+        self.env_type = str(index['env_type'])
+        self.seeds = index['seeds']
+        self.offsets = index['offsets']
+        self.mission_ids = index['mission_ids']
+        self.missions = [str(m) for m in index['missions']]
+        self.rng_pos = index['rng_pos']
+        self.prev_start = index['prev_start']
+        self.gen_version = int(index['gen_version'])
+
+        self.planes = np.load(os.path.join(path, 'planes.npy'), mmap_mode='r')
+        self.rng_keys = np.load(os.path.join(path, 'rng_keys.npy'), mmap_mode='r')
+        self.records = np.load(os.path.join(path, 'records.npy'), mmap_mode='r')
+
+        self.seed_to_idx = {
+            int(seed): idx for idx, seed in enumerate(self.seeds)
+        }
+
+    @staticmethod
+    def generate(env, seeds, path):
+        """
+        Generate the levels of an environment for the given seeds, in
+        order, and write them to a new bank in directory path
+        """
+
+        env = env.unwrapped
+        seeds = [int(seed) for seed in seeds]
+        assert len(seeds) > 0
+        assert len(set(seeds)) == len(seeds), "seeds must be unique"
+
+        planes = np.zeros((len(seeds), env.width, env.height, 3), dtype='uint8')
+        records = []
+        missions = []
+        mission_ids = np.zeros(len(seeds), dtype=np.int64)
+        mission_to_id = {}
+        rng_keys = []
+        rng_pos = np.zeros(len(seeds), dtype=np.int64)
+
+        # Starting position before each level, or -1 if there is none
+        prev_start = np.full((len(seeds), 2), -1, dtype=np.int64)
+
+        for idx, seed in enumerate(seeds):
+            if env.start_pos is not None:
+                prev_start[idx] = env.start_pos
+            env.seed(seed)
+            env.reset()
+            state = env.get_state()
+
+            planes[idx] = state['planes']
+
+            # MT19937 state, without the cached gaussian, which the
+            # environments don't use
+            rng_name, keys, pos, has_gauss, _ = state['rng']
+            assert rng_name == 'MT19937' and has_gauss == 0
+            rng_keys.append(keys)
+            rng_pos[idx] = pos
+
+            # The grid is rebuilt from the planes, and the mission is
+            # stored by id
+            attrs = state['env']
+            del state['planes']
+            del state['rng']
+            del state['owner']
+            state['env'] = {
+                k: v for k, v in attrs.items()
+                if k not in ('grid', 'mission') and k not in CONFIG_ATTRS
+            }
+            records.append(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+            if env.mission not in mission_to_id:
+                mission_to_id[env.mission] = len(missions)
+                missions.append(env.mission)
+            mission_ids[idx] = mission_to_id[env.mission]
+
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(record) for record in records])
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'planes.npy'), planes)
+        np.save(os.path.join(path, 'rng_keys.npy'), np.stack(rng_keys))
+        np.save(
+            os.path.join(path, 'records.npy'),
+            np.frombuffer(b''.join(records), dtype='uint8')
+        )
+        np.savez(
+            os.path.join(path, 'index.npz'),
+            env_type=type(env).__name__,
+            seeds=np.array(seeds, dtype=np.int64),
+            offsets=offsets,
+            mission_ids=mission_ids,
+            missions=np.array(missions, dtype=str),
+            rng_pos=rng_pos,
+            prev_start=prev_start,
+            gen_version=env.gen_version
+        )
+
+        return LevelBank(path)
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def __contains__(self, seed):
+        return seed in self.seed_to_idx
+
+    def index(self, seed):
+        """
+        Get the index of the level generated with a given seed
+        """
+
+        return self.seed_to_idx[seed]
+
+    def matches(self, env, idx):
+        """
+        Check if level idx is the one that seeding an environment with its
+        seed and calling reset would generate. For version 1 generators,
+        the environment must have the starting position the level was
+        generated after.
+        """
+
+        env = env.unwrapped
+        if env.gen_version >= 2:
+            return True
+
+        if env.start_pos is None:
+            return self.prev_start[idx, 0] < 0
+
+        x, y = env.start_pos
+        return (x, y) == tuple(self.prev_start[idx].tolist())
+
+    def load(self, env, idx):
+        """
+        Load level idx into an environment, in place of a reset
+        """
+
+        env = env.unwrapped
+        assert type(env).__name__ == self.env_type, \
+            "bank was generated for %s" % self.env_type
+        assert env.gen_version == self.gen_version, \
+            "bank was generated with generator version %d" % self.gen_version
+
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        state = pickle.loads(self.records[start:end].tobytes())
+
+        width, height, _ = self.planes.shape[1:]
+        state['env']['grid'] = Grid(width, height)
+        state['env']['mission'] = self.missions[self.mission_ids[idx]]
+        state['planes'] = self.planes[idx]
+        state['owner'] = None
+        state['rng'] = (
+            'MT19937',
+            np.asarray(self.rng_keys[idx]),
+            int(self.rng_pos[idx]),
+            0,
+            0.0
+        )
+
+        env.set_state(state)
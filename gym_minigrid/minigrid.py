@@ -1,6 +1,8 @@
 import math
+import threading
 import gym
 from enum import IntEnum
+from contextlib import contextmanager
 import numpy as np
 from gym import error, spaces, utils
 from gym.utils import seeding
@@ -8,53 +10,8 @@ from gym.utils import seeding
 # Size in pixels of a cell in the full-scale human view
 CELL_PIXELS = 32
 
-N_SUPPLEMENTARY_COLOR = 100
-
-# Map of color names to RGB values
-COLORS = {
-    'grey': np.array([100, 100, 100]),
-    'red'   : np.array([255, 0, 0]),
-    'green' : np.array([0, 255, 0]),
-    'blue'  : np.array([0, 0, 255]),
-    'purple': np.array([112, 39, 195]),
-    'yellow': np.array([255, 255, 0]),
-    'pink'  : np.array([255, 0, 144]),
-    'brown' : np.array([93, 67, 44]),
-    'lblue' : np.array([115, 194, 251]),
-    'lgreen': np.array([152, 251, 152])
-}
-
-len_base_color = len(COLORS)
-
-while True:
-    for i in range(N_SUPPLEMENTARY_COLOR):
-        COLORS['color'+str(i+len_base_color)] = np.random.randint(0, 255, size=3)
-    if len(set(tuple(color) for color in COLORS.values())) == len(COLORS):
-        print("Colors generation ok")
-        break
-    else:
-        print("Problem, regenerating colors")
-
-COLOR_NAMES = sorted(list(COLORS.keys()))
-
-# Used to map colors to integers
-COLOR_TO_IDX = {
-    'grey'  : 0,
-    'green' : 1,
-    'blue'  : 2,
-    'purple': 3,
-    'yellow': 4,
-    'red'   : 5,
-    'pink'  : 6,
-    'brown' : 7,
-    'lblue' : 8,
-    'lgreen': 9
-}
-
-for i in range(N_SUPPLEMENTARY_COLOR):
-    COLOR_TO_IDX['color'+str(i+len_base_color)] = i+len_base_color
-
-IDX_TO_COLOR = dict(zip(COLOR_TO_IDX.values(), COLOR_TO_IDX.keys()))
+# Colors, their names and indices
+from .palette import *
 
 # Map of object type to integers
 OBJECT_TO_IDX = {
@@ -104,6 +61,17 @@ class WorldObj:
         # Current position of the object
         self.cur_pos = None
 
+    def __setattr__(self, name, value):
+        assert not self.__dict__.get('_shared', False), \
+            "plain objects returned by Grid.get are shared, set a new one instead"
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        # Copies of shared instances can be modified
+        state = dict(self.__dict__)
+        state.pop('_shared', None)
+        return state
+
     def can_overlap(self):
         """Can the agent overlap with this?"""
         return False
@@ -128,6 +96,23 @@ class WorldObj:
         """Draw this object with the given renderer"""
         raise NotImplementedError
 
+    def encode(self):
+        """Encode the description of this object as a 3-tuple of integers"""
+        return (OBJECT_TO_IDX[self.type], COLOR_TO_IDX[self.color], 0)
+
+    @staticmethod
+    def decode(type_idx, color_idx, state):
+        """Create an object from a 3-tuple state description"""
+
+        if type_idx == OBJECT_TO_IDX['unseen'] or \
+                type_idx == OBJECT_TO_IDX['empty']:
+            return None
+
+        objType = IDX_TO_OBJECT[type_idx]
+        assert objType in OBJ_DECODERS, "unknown obj type in decode '%s'" % objType
+
+        return OBJ_DECODERS[objType](IDX_TO_COLOR[color_idx], state)
+
     def _set_color(self, r):
         """Set the color of this object as the active drawing color"""
         c = COLORS[self.color]
@@ -296,16 +281,29 @@ class Door(WorldObj):
     def see_behind(self):
         return self.is_open
 
+    def encode(self):
+        # State, 0: open, 1: closed, 2: locked
+        if self.is_locked:
+            state = 2
+        elif not self.is_open:
+            state = 1
+        else:
+            state = 0
+
+        return (OBJECT_TO_IDX[self.type], COLOR_TO_IDX[self.color], state)
+
     def toggle(self, env, pos):
         # If the player has the right key to open the door
         if self.is_locked:
             if isinstance(env.carrying, Key) and env.carrying.color == self.color:
                 self.is_locked = False
                 self.is_open = True
+                env.grid.set(*pos, self)
                 return True
             return False
 
         self.is_open = not self.is_open
+        env.grid.set(*pos, self)
         return True
 
     def render(self, r):
@@ -430,11 +428,170 @@ class Box(WorldObj):
         env.grid.set(*pos, self.contains)
         return True
 
+# Constructors used to decode objects, indexed by object type.
+# Each one takes a color name and a state code (0: open, 1: closed,
+# 2: locked). Custom object types can be added to this table.
+OBJ_DECODERS = {
+    'wall'  : lambda color, state: Wall(color),
+    'floor' : lambda color, state: Floor(color),
+    'ball'  : lambda color, state: Ball(color),
+    'key'   : lambda color, state: Key(color),
+    'box'   : lambda color, state: Box(color),
+    'door'  : lambda color, state: Door(color, state == 0, state == 2),
+    'goal'  : lambda color, state: Goal(),
+    'lava'  : lambda color, state: Lava(),
+    'water' : lambda color, state: Water(),
+}
+
+# Objects which are fully described by their (type, color, state) encoding.
+# Cells containing these are only stored in the grid planes, and Grid.get
+# hands out shared instances for them.
+PLAIN_OBJS = (Wall, Floor, Goal, Lava, Water)
+
+# Cache of shared instances returned by Grid.get for plain objects
+_plain_obj_cache = {}
+
+def _plain_obj(type_idx, color_idx, state):
+    key = (type_idx, color_idx, state)
+    if key not in _plain_obj_cache:
+        v = WorldObj.decode(type_idx, color_idx, state)
+
+        # Setting attributes of a shared instance fails, as it would
+        # change every cell holding the same object
+        if v is not None:
+            object.__setattr__(v, '_shared', True)
+        _plain_obj_cache[key] = v
+    return _plain_obj_cache[key]
+
+def _obj_table(fn, default):
+    """
+    Tabulate a boolean property of the decodable objects, indexed by type
+    and state code. Empty cells and unknown codes get the default value.
+    """
+
+    table = np.full((256, 256), default, dtype=bool)
+    for objType, decoder in OBJ_DECODERS.items():
+        for state in range(3):
+            v = decoder('grey', state)
+            table[OBJECT_TO_IDX[objType], state] = fn(v)
+    return table
+
+# Which objects can be seen behind, indexed by type and state code.
+# Objects in a grid's side table are asked directly instead.
+SEE_BEHIND = _obj_table(lambda v: v.see_behind(), True)
+
+# Widest view for which visibility tables are precomputed
+MAX_VIS_TABLE_WIDTH = 10
+
+# Visibility tables, indexed by view width
+_vis_tables = {}
+
+def _vis_row(transparent, seen, width):
+    """
+    Spread visibility along one row of the agent view. Rows are bitsets,
+    with bit i standing for column i. Visibility spreads from the seen
+    cells to their neighbors, through the transparent cells. This works
+    on Python integers and element-wise on integer arrays.
+    """
+
+    full = (1 << width) - 1
+    vis = seen
+    for _ in range(width):
+        spread = vis & transparent
+        vis = vis | (((spread << 1) | (spread >> 1)) & full)
+    return vis
+
+def _vis_table(width):
+    """
+    Get the table of visible row bits indexed by the transparent and seen
+    row bits, for views of a given width
+    """
+
+    if width > MAX_VIS_TABLE_WIDTH:
+        return None
+
+    if width not in _vis_tables:
+        bits = np.arange(1 << width, dtype=np.int64)
+        table = _vis_row(bits[:, None], bits[None, :], width)
+        _vis_tables[width] = table.astype(np.uint16)
+
+    return _vis_tables[width]
+
+# Index maps of the agent view, indexed by (direction, view size)
+_view_maps = {}
+
+def _view_map(agent_dir, view_size):
+    """
+    Get the offsets, relative to the agent position, of the grid cells
+    seen in each cell of the agent view, along with the inverse map from
+    offsets (shifted by view_size - 1) to view cells. The agent sits at
+    the bottom-center of its view, looking up.
+    """
+
+    key = (agent_dir, view_size)
+    if key not in _view_maps:
+        # Square of cells in front of the agent, as in get_view_exts
+        if agent_dir == 0:
+            top = (0, -(view_size // 2))
+        elif agent_dir == 1:
+            top = (-(view_size // 2), 0)
+        elif agent_dir == 2:
+            top = (-view_size + 1, -(view_size // 2))
+        elif agent_dir == 3:
+            top = (-(view_size // 2), -view_size + 1)
+        else:
+            assert False, "invalid agent direction"
+
+        offs_x, offs_y = np.meshgrid(
+            top[0] + np.arange(view_size),
+            top[1] + np.arange(view_size),
+            indexing='ij'
+        )
+
+        # Rotate to the agent's point of view, as with Grid.rotate_left
+        for _ in range(agent_dir + 1):
+            offs_x = np.flip(offs_x, 0).T
+            offs_y = np.flip(offs_y, 0).T
+
+        vi, vj = np.meshgrid(
+            np.arange(view_size),
+            np.arange(view_size),
+            indexing='ij'
+        )
+
+        # Inverse map, -1 where an offset is outside of the view
+        size = 2 * view_size - 1
+        inv = np.full((size, size, 2), -1, dtype=np.int64)
+        inv[offs_x + view_size - 1, offs_y + view_size - 1] = \
+            np.stack([vi, vj], axis=-1)
+
+        _view_maps[key] = (
+            np.ascontiguousarray(offs_x),
+            np.ascontiguousarray(offs_y),
+            inv
+        )
+
+    return _view_maps[key]
+
 class Grid:
     """
     Represent a grid and operations on it
+
+    Cell contents are stored as parallel uint8 planes holding the type,
+    color and state codes of every cell, in the same layout as the
+    encode() output. Objects which need to keep their identity (doors,
+    keys, balls, boxes and any custom object) are also kept in a side
+    table indexed by cell position. The planes are written by set(), so
+    an object whose encoding changes must be set() again, as Door.toggle
+    does.
     """
 
+    # Encoding of an empty cell
+    EMPTY = (OBJECT_TO_IDX['empty'], 0, 0)
+
+    # Encoding of the walls created by horz_wall/vert_wall and slice
+    WALL = (OBJECT_TO_IDX['wall'], COLOR_TO_IDX['grey'], 0)
+
     def __init__(self, width, height):
         assert width >= 3
         assert height >= 3
@@ -442,27 +599,39 @@ class Grid:
         self.width = width
         self.height = height
 
-        self.grid = [None] * width * height
+        # Type, color and state planes, indexed by (i, j)
+        self.array = np.zeros((width, height, 3), dtype='uint8')
+        self.array[:, :] = Grid.EMPTY
+
+        # Objects with an identity, indexed by (i, j)
+        self.objs = {}
+
+        # Planes surrounded by a border of walls, see padded()
+        self._padded = None
+        self._pad = 0
 
     def __contains__(self, key):
         if isinstance(key, WorldObj):
-            for e in self.grid:
+            for e in self.objs.values():
                 if e is key:
                     return True
+            if type(key) in PLAIN_OBJS:
+                code = np.array(key.encode(), dtype='uint8')
+                return bool(np.any(np.all(self.array == code, axis=2)))
         elif isinstance(key, tuple):
-            for e in self.grid:
-                if e is None:
-                    continue
-                if (e.color, e.type) == key:
-                    return True
-                if key[0] is None and key[1] == e.type:
-                    return True
+            color, type = key
+            if type not in OBJECT_TO_IDX:
+                return False
+            found = self.array[:, :, 0] == OBJECT_TO_IDX[type]
+            if color is not None:
+                if color not in COLOR_TO_IDX:
+                    return False
+                found &= self.array[:, :, 1] == COLOR_TO_IDX[color]
+            return bool(np.any(found))
         return False
 
     def __eq__(self, other):
-        grid1 = self.encode()
-        grid2 = other.encode()
-        return np.array_equal(grid2, grid1)
+        return np.array_equal(self.array, other.array)
 
     def __ne__(self, other):
         return not self == other
@@ -474,24 +643,58 @@ class Grid:
     def set(self, i, j, v):
         assert i >= 0 and i < self.width
         assert j >= 0 and j < self.height
-        self.grid[j * self.width + i] = v
+
+        if v is None:
+            self.array[i, j] = Grid.EMPTY
+            self.objs.pop((i, j), None)
+            return
+
+        self.array[i, j] = v.encode()
+        if type(v) in PLAIN_OBJS:
+            self.objs.pop((i, j), None)
+        else:
+            self.objs[(i, j)] = v
 
     def get(self, i, j):
+        """
+        Get the object in a cell. Plain objects (walls, floors, goals,
+        lava and water) are shared instances which can't be modified:
+        set a new object in the cell to change it.
+        """
+
         assert i >= 0 and i < self.width
         assert j >= 0 and j < self.height
-        return self.grid[j * self.width + i]
+
+        v = self.objs.get((i, j))
+        if v is not None:
+            return v
+
+        return _plain_obj(*self.array[i, j].tolist())
+
+    def _clear_objs(self, x, y, w, h):
+        """
+        Drop the side table entries within a rectangle
+        """
+
+        for (i, j) in list(self.objs):
+            if x <= i < x + w and y <= j < y + h:
+                del self.objs[(i, j)]
 
     def horz_wall(self, x, y, length=None):
         if length is None:
             length = self.width - x
-        for i in range(0, length):
-            self.set(x + i, y, Wall())
+        assert x >= 0 and x + length <= self.width
+        assert y >= 0 and y < self.height
+        self.array[x:x+length, y] = Grid.WALL
+        self._clear_objs(x, y, length, 1)
 
     def vert_wall(self, x, y, length=None):
         if length is None:
             length = self.height - y
-        for j in range(0, length):
-            self.set(x, y + j, Wall())
+        assert x >= 0 and x < self.width
+        assert y >= 0 and y + length <= self.height
+        self.array[x, y:y+length] = Grid.WALL
+        self._clear_objs(x, y, 1, length)
 
     def wall_rect(self, x, y, w, h):
         self.horz_wall(x, y, w)
@@ -506,10 +709,11 @@ class Grid:
 
         grid = Grid(self.height, self.width)
 
-        for i in range(self.width):
-            for j in range(self.height):
-                v = self.get(i, j)
-                grid.set(j, grid.height - 1 - i, v)
+        # Cell (i, j) moves to (j, width - 1 - i)
+        grid.array[:, :] = np.flip(self.array, 0).swapaxes(0, 1)
+        grid.objs = {
+            (j, grid.height - 1 - i): v for (i, j), v in self.objs.items()
+        }
 
         return grid
 
@@ -520,18 +724,69 @@ class Grid:
 
         grid = Grid(width, height)
 
-        for j in range(0, height):
-            for i in range(0, width):
-                x = topX + i
-                y = topY + j
+        # Cells outside of this grid are walls
+        grid.array[:, :] = Grid.WALL
+
+        # Overlap between the slice and this grid, in grid coordinates
+        x0 = max(topX, 0)
+        y0 = max(topY, 0)
+        x1 = min(topX + width, self.width)
+        y1 = min(topY + height, self.height)
 
-                if x >= 0 and x < self.width and \
-                   y >= 0 and y < self.height:
-                    v = self.get(x, y)
-                else:
-                    v = Wall()
+        if x0 < x1 and y0 < y1:
+            grid.array[x0-topX:x1-topX, y0-topY:y1-topY] = \
+                self.array[x0:x1, y0:y1]
 
-                grid.set(i, j, v)
+            for (i, j), v in self.objs.items():
+                if x0 <= i < x1 and y0 <= j < y1:
+                    grid.objs[(i - topX, j - topY)] = v
+
+        return grid
+
+    def padded(self, pad):
+        """
+        Get the grid planes surrounded by a border of walls at least pad
+        cells wide, along with the border width. The grid planes are
+        stored inside of this border, so it stays up to date.
+        """
+
+        if self._padded is None or self._pad < pad or \
+                self.array.base is not self._padded:
+            pad = max(pad, self._pad)
+            padded = np.empty(
+                (self.width + 2 * pad, self.height + 2 * pad, 3),
+                dtype='uint8'
+            )
+            padded[:, :] = Grid.WALL
+            padded[pad:pad+self.width, pad:pad+self.height] = self.array
+
+            self._padded = padded
+            self._pad = pad
+            self.array = padded[pad:pad+self.width, pad:pad+self.height]
+
+        return self._padded, self._pad
+
+    def view(self, agent_pos, agent_dir, view_size):
+        """
+        Get the square sub-grid seen by an agent, rotated so that the
+        agent is at the bottom-center, looking up. Cells outside of this
+        grid are seen as walls.
+        """
+
+        offs_x, offs_y, inv = _view_map(agent_dir, view_size)
+        padded, pad = self.padded(view_size - 1)
+        ax, ay = agent_pos
+
+        grid = Grid(view_size, view_size)
+        grid.array = padded[offs_x + (ax + pad), offs_y + (ay + pad)]
+
+        for (i, j), v in self.objs.items():
+            ox = i - ax + view_size - 1
+            oy = j - ay + view_size - 1
+            if 0 <= ox < inv.shape[0] and 0 <= oy < inv.shape[1]:
+                vi, vj = inv[ox, oy].tolist()
+                if vi >= 0:
+                    grid.objs[(vi, vj)] = v
 
         return grid
 
@@ -586,124 +841,247 @@ class Grid:
 
         r.pop()
 
-    def encode(self, vis_mask=None):
+    def encode(self, vis_mask=None, out=None):
         """
         Produce a compact numpy encoding of the grid
+        Cells outside of vis_mask are encoded as unseen (all zeros)
+        :param out: array to write the encoding into, instead of a new one
         """
 
-        if vis_mask is None:
-            vis_mask = np.ones((self.width, self.height), dtype=bool)
-
-        array = np.zeros((self.width, self.height, 3), dtype='uint8')
-        for i in range(self.width):
-            for j in range(self.height):
-                if vis_mask[i, j]:
-                    v = self.get(i, j)
-
-                    if v is None:
-                        array[i, j, 0] = OBJECT_TO_IDX['empty']
-                        array[i, j, 1] = 0
-                        array[i, j, 2] = 0
-                    else:
-                        # State, 0: open, 1: closed, 2: locked
-                        state = 0
-                        if hasattr(v, 'is_open') and not v.is_open:
-                            state = 1
-                        if hasattr(v, 'is_locked') and v.is_locked:
-                            state = 2
+        if out is None:
+            array = self.array.copy()
+        else:
+            array = out
+            array[:] = self.array
 
-                        array[i, j, 0] = OBJECT_TO_IDX[v.type]
-                        array[i, j, 1] = COLOR_TO_IDX[v.color]
-                        array[i, j, 2] = state
+        if vis_mask is not None:
+            array[np.logical_not(vis_mask)] = 0
 
         return array
 
     @staticmethod
-    def decode(array):
+    def decode(array, lazy=False):
         """
         Decode an array grid encoding back into a grid
+        :param lazy: only copy the encoding into the grid planes, without
+            creating objects. The cells of the resulting grid are shared
+            instances, which must not be modified.
         """
 
         width, height, channels = array.shape
         assert channels == 3
 
         grid = Grid(width, height)
-        for i in range(width):
-            for j in range(height):
-                typeIdx, colorIdx, state = array[i, j]
+        grid.array[:, :] = array
 
-                if typeIdx == OBJECT_TO_IDX['unseen'] or \
-                        typeIdx == OBJECT_TO_IDX['empty']:
-                    continue
+        types = grid.array[:, :, 0]
+        grid.array[types == OBJECT_TO_IDX['unseen']] = Grid.EMPTY
+
+        # Create the objects which need an identity, one type at a time
+        for type_idx in np.unique(types).tolist():
+            if type_idx == OBJECT_TO_IDX['empty']:
+                continue
+
+            objType = IDX_TO_OBJECT[type_idx]
+            assert objType in OBJ_DECODERS, "unknown obj type in decode '%s'" % objType
 
-                objType = IDX_TO_OBJECT[typeIdx]
-                color = IDX_TO_COLOR[colorIdx]
-                # State, 0: open, 1: closed, 2: locked
-                is_open = state == 0
-                is_locked = state == 2
-
-                if objType == 'wall':
-                    v = Wall(color)
-                elif objType == 'floor':
-                    v = Floor(color)
-                elif objType == 'ball':
-                    v = Ball(color)
-                elif objType == 'key':
-                    v = Key(color)
-                elif objType == 'box':
-                    v = Box(color)
-                elif objType == 'door':
-                    v = Door(color, is_open, is_locked)
-                elif objType == 'goal':
-                    v = Goal()
-                elif objType == 'lava':
-                    v = Lava()
-                else:
-                    assert False, "unknown obj type in decode '%s'" % objType
-
-                grid.set(i, j, v)
+            if lazy:
+                continue
+
+            decoder = OBJ_DECODERS[objType]
+            xs, ys = np.nonzero(types == type_idx)
+            for i, j in zip(xs.tolist(), ys.tolist()):
+                _, colorIdx, state = grid.array[i, j].tolist()
+                v = decoder(IDX_TO_COLOR[colorIdx], state)
+
+                # Plain objects live in the planes only
+                if type(v) in PLAIN_OBJS:
+                    break
+
+                grid.objs[(i, j)] = v
 
         return grid
 
+    def see_behind_mask(self):
+        """
+        Compute which cells of the grid the agent can see behind
+        """
+
+        mask = SEE_BEHIND[self.array[:, :, 0], self.array[:, :, 2]]
+
+        for (i, j), v in self.objs.items():
+            mask[i, j] = v.see_behind()
+
+        return mask
+
     def process_vis(grid, agent_pos):
-        mask = np.zeros(shape=(grid.width, grid.height), dtype=np.bool)
+        """
+        Compute which cells of the agent view are visible, and clear the
+        cells which are not. Visibility spreads from the agent position
+        along each row and up to the next row, through the cells which
+        can be seen behind.
+        """
 
-        mask[agent_pos[0], agent_pos[1]] = True
+        width, height = grid.width, grid.height
+        table = _vis_table(width)
 
-        for j in reversed(range(0, grid.height)):
-            for i in range(0, grid.width-1):
-                if not mask[i, j]:
-                    continue
+        # Pack the rows of the transparency mask into bitsets
+        col_bits = 1 << np.arange(width, dtype=np.int64)
+        transparent = grid.see_behind_mask()
+        rows = (transparent * col_bits[:, None]).sum(axis=0).tolist()
 
-                cell = grid.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
+        full = (1 << width) - 1
+        vis_rows = [0] * height
+        seen = 0
 
-                mask[i+1, j] = True
-                if j > 0:
-                    mask[i+1, j-1] = True
-                    mask[i, j-1] = True
+        for j in reversed(range(0, height)):
+            if j == agent_pos[1]:
+                seen |= 1 << int(agent_pos[0])
 
-            for i in reversed(range(1, grid.width)):
-                if not mask[i, j]:
-                    continue
+            if table is not None:
+                vis = int(table[rows[j], seen])
+            else:
+                vis = _vis_row(rows[j], seen, width)
+            vis_rows[j] = vis
 
-                cell = grid.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
+            # Cells seen behind make their neighbors in the row above visible
+            spread = vis & rows[j]
+            seen = (spread | (spread << 1) | (spread >> 1)) & full
 
-                mask[i-1, j] = True
-                if j > 0:
-                    mask[i-1, j-1] = True
-                    mask[i, j-1] = True
+        mask = (np.array(vis_rows)[None, :] & col_bits[:, None]) != 0
 
-        for j in range(0, grid.height):
-            for i in range(0, grid.width):
-                if not mask[i, j]:
-                    grid.set(i, j, None)
+        grid.array[~mask] = Grid.EMPTY
+        for (i, j) in list(grid.objs):
+            if not mask[i, j]:
+                del grid.objs[(i, j)]
 
         return mask
 
+class BufferedRNG:
+    """
+    Random number generator serving uniform floats drawn in blocks from a
+    RandomState, which is much cheaper than drawing numbers one by one
+    """
+
+    def __init__(self, np_random, block_size=256):
+        self.np_random = np_random
+        self.block_size = block_size
+        self.block = []
+        self.idx = 0
+
+    def random(self):
+        """
+        Generate a random float in [0,1[
+        """
+
+        if self.idx == len(self.block):
+            self.block = self.np_random.random_sample(self.block_size).tolist()
+            self.idx = 0
+
+        value = self.block[self.idx]
+        self.idx += 1
+        return value
+
+    def randint(self, low, high):
+        return low + int(self.random() * (high - low))
+
+    def uniform(self, low, high):
+        return low + self.random() * (high - low)
+
+    def get_state(self):
+        """
+        Get the numbers left in the block. The rest of the state is that
+        of the underlying RandomState.
+        """
+
+        return self.block[self.idx:]
+
+    def set_state(self, state):
+        self.block = list(state)
+        self.idx = 0
+
+class LazyObs(dict):
+    """
+    Observation dictionary whose image is only generated when accessed.
+    The image reflects the state of the environment when it is first
+    read, which must happen before the next step or reset.
+    """
+
+    def __init__(self, env, **kwargs):
+        super().__init__(**kwargs)
+        self.env = env
+        self.state_version = env.state_version
+
+    def load(self):
+        """
+        Generate the image, if this hasn't been done yet
+        """
+
+        if not dict.__contains__(self, 'image'):
+            assert self.state_version == self.env.state_version, \
+                "lazy observation read after the environment changed"
+            out = None
+            if self.env.obs_buffer is not None:
+                out = self.env.obs_buffer['image']
+            self['image'] = self.env.gen_obs_image(out=out)
+        return self
+
+    def __missing__(self, key):
+        if key != 'image':
+            raise KeyError(key)
+        return self.load()['image']
+
+    def __contains__(self, key):
+        return key == 'image' or dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        return dict.__iter__(self.load())
+
+    def __len__(self):
+        return dict.__len__(self.load())
+
+    def __repr__(self):
+        return dict.__repr__(self.load())
+
+    def keys(self):
+        return dict.keys(self.load())
+
+    def values(self):
+        return dict.values(self.load())
+
+    def items(self):
+        return dict.items(self.load())
+
+    def copy(self):
+        return dict(self.items())
+
+    def __reduce__(self):
+        # Pickle as a plain dictionary, rather than with the environment
+        return (dict, (self.copy(),))
+
+# Settings of the environments being constructed by the current thread
+_construction = threading.local()
+
+@contextmanager
+def deferred_reset():
+    """
+    Context in which the environments constructed by the current thread
+    neither seed themselves nor generate a level, which makes creating
+    them cheap. The first reset does both, with the seed given to the
+    constructor unless seed is called before. Environments constructed
+    by other threads meanwhile are not affected.
+    """
+
+    defer = getattr(_construction, 'defer_reset', False)
+    _construction.defer_reset = True
+    try:
+        yield
+    finally:
+        _construction.defer_reset = defer
+
 class MiniGridEnv(gym.Env):
     """
     2D grid world game environment
@@ -714,6 +1092,26 @@ class MiniGridEnv(gym.Env):
         'video.frames_per_second' : 10
     }
 
+    # Ways of generating observations, see set_obs_mode
+    OBS_MODES = ('partial', 'lazy', 'none')
+
+    # Attributes which are not part of the state saved by get_state
+    STATELESS_ATTRS = frozenset([
+        'grid_render', 'obs_render', 'frame_render', 'obs_buffer',
+        'obs_mode', 'state_version', 'np_random', 'rng'
+    ])
+
+    # Version of the level generation helpers. Version 1 draws random
+    # numbers one at a time and places objects by rejection sampling, and
+    # reproduces the levels of earlier releases for a given seed. Version 2
+    # draws random numbers in blocks, places objects among the free cells
+    # and forgets the previous starting position on reset, which is faster
+    # but gives different levels.
+    gen_version = 1
+
+    # Backend used by render when none is given, 'qt' or 'numpy'
+    render_backend = 'qt'
+
     # Enumeration of possible actions
     class Actions(IntEnum):
         # Turn left, turn right, move forward
@@ -777,6 +1175,9 @@ class MiniGridEnv(gym.Env):
         # Renderer used to render observations (small-scale agent view)
         self.obs_render = None
 
+        # Last frame of the numpy render backend, see render
+        self.frame_render = None
+
         # Environment configuration
         self.width = width
         self.height = height
@@ -787,13 +1188,39 @@ class MiniGridEnv(gym.Env):
         self.start_pos = None
         self.start_dir = None
 
-        # Initialize the RNG
-        self.seed(seed=seed)
+        # Observation filled in place by gen_obs, see set_obs_buffer
+        self.obs_buffer = None
+
+        # How gen_obs produces the partial view, see set_obs_mode
+        self.obs_mode = 'partial'
 
-        # Initialize the state
-        self.reset()
+        # Incremented whenever the state changes, to expire lazy observations
+        self.state_version = 0
+
+        # Seed used if the environment isn't seeded before the first reset
+        self.init_seed = seed
+
+        # Initialize the RNG and the state, unless deferred to the first
+        # reset, see deferred_reset
+        if getattr(_construction, 'defer_reset', False):
+            self.np_random = None
+            self.rng = None
+        else:
+            self.seed(seed=seed)
+            self.reset()
 
     def reset(self):
+        # Seed the RNG on the first reset of a deferred environment
+        if self.np_random is None:
+            self.seed(seed=self.init_seed)
+
+        self.state_version += 1
+
+        # Version 1 generators keep avoiding the previous starting
+        # position, as earlier releases did, to reproduce their levels
+        if self.gen_version >= 2:
+            self.forget_start()
+
         # Generate a new random grid at the start of each episode
         # To keep the same grid for each episode, call env.seed() with
         # the same seed before calling env.reset()
@@ -821,11 +1248,88 @@ class MiniGridEnv(gym.Env):
         obs = self.gen_obs()
         return obs
 
+    def forget_start(self):
+        """
+        Forget the starting position of the previous episode. Version 1
+        generators which place objects before the agent avoid it, so that
+        their next level depends on it as well as on the random number
+        generator. Version 2 generators always forget it on reset.
+        """
+
+        self.start_pos = None
+        self.start_dir = None
+
     def seed(self, seed=1337):
         # Seed the random number generator
         self.np_random, _ = seeding.np_random(seed)
+        self.rng = BufferedRNG(self.np_random)
         return [seed]
 
+    def get_state(self, rng=True):
+        """
+        Take a snapshot of the state of the environment, for set_state.
+        World objects are saved through their attributes, so that the
+        references to them held by the environment remain valid. The
+        snapshot refers to the grid and objects of this instance, which
+        other instances copy when restoring it.
+        :param rng: also save the random number generator state, which
+            takes most of the time, and can be skipped when steps don't
+            draw random numbers
+        """
+
+        grid = self.grid
+
+        # Objects in the grid, carried by the agent or inside boxes
+        objs = list(grid.objs.values())
+        if self.carrying is not None:
+            objs.append(self.carrying)
+        for obj in objs:
+            if obj.contains is not None:
+                objs.append(obj.contains)
+
+        return {
+            'env': {
+                k: v for k, v in vars(self).items()
+                if k not in self.STATELESS_ATTRS
+            },
+            'planes': grid.array.copy(),
+            'grid_objs': dict(grid.objs),
+            'objs': [(obj, dict(vars(obj))) for obj in objs],
+            'rng': self.np_random.get_state() if rng else None,
+            'rng_buffer': self.rng.get_state() if rng else None,
+            'owner': id(self)
+        }
+
+    def set_state(self, state):
+        """
+        Restore a snapshot taken by get_state. Snapshots taken by another
+        instance are copied first, so that the two instances don't share
+        a grid and objects. An owner of None marks snapshots which hold
+        their own copies, such as unpickled ones, and are used as is.
+        """
+
+        owner = state.get('owner')
+        if owner is not None and owner != id(self):
+            from copy import deepcopy
+            state = deepcopy(state)
+
+        vars(self).update(state['env'])
+
+        grid = self.grid
+        grid.array[:] = state['planes']
+        grid.objs = dict(state['grid_objs'])
+
+        for obj, attrs in state['objs']:
+            obj_vars = vars(obj)
+            obj_vars.clear()
+            obj_vars.update(attrs)
+
+        if state['rng'] is not None:
+            self.np_random.set_state(state['rng'])
+            self.rng.set_state(state['rng_buffer'])
+
+        self.state_version += 1
+
     @property
     def steps_remaining(self):
         return self.max_steps - self.step_count
@@ -906,6 +1410,9 @@ class MiniGridEnv(gym.Env):
         Generate random integer in [low,high[
         """
 
+        if self.gen_version >= 2:
+            return self.rng.randint(low, high)
+
         return self.np_random.randint(low, high)
 
     def _rand_float(self, low, high):
@@ -913,6 +1420,9 @@ class MiniGridEnv(gym.Env):
         Generate random float in [low,high[
         """
 
+        if self.gen_version >= 2:
+            return self.rng.uniform(low, high)
+
         return self.np_random.uniform(low, high)
 
     def _rand_bool(self):
@@ -920,6 +1430,9 @@ class MiniGridEnv(gym.Env):
         Generate random boolean value
         """
 
+        if self.gen_version >= 2:
+            return self.rng.random() < 0.5
+
         return (self.np_random.randint(0, 2) == 0)
 
     def _rand_elem(self, iterable):
@@ -927,7 +1440,12 @@ class MiniGridEnv(gym.Env):
         Pick a random element in a list
         """
 
-        lst = list(iterable)
+        # Sequences can be indexed without being copied
+        if isinstance(iterable, (list, tuple, str)):
+            lst = iterable
+        else:
+            lst = list(iterable)
+
         idx = self._rand_int(0, len(lst))
         return lst[idx]
 
@@ -939,12 +1457,15 @@ class MiniGridEnv(gym.Env):
         lst = list(iterable)
         assert num_elems <= len(lst)
 
+        if self.gen_version >= 2:
+            idxs = self.np_random.permutation(len(lst))[:num_elems]
+            return [lst[idx] for idx in idxs]
+
         out = []
 
         while len(out) < num_elems:
-            elem = self._rand_elem(lst)
-            lst.remove(elem)
-            out.append(elem)
+            idx = self._rand_int(0, len(lst))
+            out.append(lst.pop(idx))
 
         return out
 
@@ -961,8 +1482,8 @@ class MiniGridEnv(gym.Env):
         """
 
         return (
-            self.np_random.randint(xLow, xHigh),
-            self.np_random.randint(yLow, yHigh)
+            self._rand_int(xLow, xHigh),
+            self._rand_int(yLow, yHigh)
         )
 
     def place_obj(self,
@@ -986,6 +1507,60 @@ class MiniGridEnv(gym.Env):
         if size is None:
             size = (self.grid.width, self.grid.height)
 
+        # Empty cells of the rectangle, read from the type plane
+        x0, y0 = max(top[0], 0), max(top[1], 0)
+        free = self.grid.array[x0:top[0]+size[0], y0:top[1]+size[1], 0] == \
+            OBJECT_TO_IDX['empty']
+        if self.start_pos is not None:
+            sx, sy = self.start_pos[0] - x0, self.start_pos[1] - y0
+            if 0 <= sx < free.shape[0] and 0 <= sy < free.shape[1]:
+                free[sx, sy] = False
+
+        # Fail instead of sampling forever when there is no free cell
+        if not free.any():
+            raise RecursionError('no empty cell to place object in place_obj')
+
+        if self.gen_version >= 2:
+            pos = self._sample_free_cell(free, (x0, y0), reject_fn)
+        else:
+            pos = self._sample_cell(top, size, reject_fn, max_tries)
+
+        self.grid.set(*pos, obj)
+
+        if obj is not None:
+            obj.init_pos = pos
+            obj.cur_pos = pos
+
+        return pos
+
+    def _sample_free_cell(self, free, top, reject_fn):
+        """
+        Draw a position uniformly among the free cells not rejected by
+        reject_fn, testing candidates in random order
+        """
+
+        cells = np.argwhere(free) + top
+        num_cells = len(cells)
+
+        while num_cells > 0:
+            idx = self._rand_int(0, num_cells)
+            pos = cells[idx]
+
+            if not reject_fn or not reject_fn(self, pos):
+                return pos
+
+            # Remove the rejected cell from the candidates
+            num_cells -= 1
+            cells[idx] = cells[num_cells]
+
+        raise RecursionError('all empty cells rejected in place_obj')
+
+    def _sample_cell(self, top, size, reject_fn, max_tries):
+        """
+        Draw positions in the rectangle until one is free and not
+        rejected by reject_fn, as generators of version 1 do
+        """
+
         num_tries = 0
 
         while True:
@@ -1013,15 +1588,7 @@ class MiniGridEnv(gym.Env):
             if reject_fn and reject_fn(self, pos):
                 continue
 
-            break
-
-        self.grid.set(*pos, obj)
-
-        if obj is not None:
-            obj.init_pos = pos
-            obj.cur_pos = pos
-
-        return pos
+            return pos
 
     def place_agent(
         self,
@@ -1156,14 +1723,14 @@ class MiniGridEnv(gym.Env):
             return False
         vx, vy = coordinates
 
-        obs = self.gen_obs()
-        obs_grid = Grid.decode(obs['image'])
+        obs_grid = Grid.decode(self.gen_obs_image(), lazy=True)
         obs_cell = obs_grid.get(vx, vy)
         world_cell = self.grid.get(x, y)
 
         return obs_cell is not None and obs_cell.type == world_cell.type
 
     def step(self, action):
+        self.state_version += 1
         self.step_count += 1
 
         reward = 0
@@ -1236,19 +1803,14 @@ class MiniGridEnv(gym.Env):
         cells the agent can actually see.
         """
 
-        topX, topY, botX, botY = self.get_view_exts()
-
-        grid = self.grid.slice(topX, topY, self.agent_view_size, self.agent_view_size)
-
-        for i in range(self.agent_dir + 1):
-            grid = grid.rotate_left()
+        grid = self.grid.view(self.agent_pos, self.agent_dir, self.agent_view_size)
 
         # Process occluders and visibility
         # Note that this incurs some performance cost
         if not self.see_through_walls:
             vis_mask = grid.process_vis(agent_pos=(self.agent_view_size // 2 , self.agent_view_size - 1))
         else:
-            vis_mask = np.ones(shape=(grid.width, grid.height), dtype=np.bool)
+            vis_mask = np.ones(shape=(grid.width, grid.height), dtype=bool)
 
         # Make it so the agent sees what it's carrying
         # We do this by placing the carried object at the agent's position
@@ -1266,12 +1828,33 @@ class MiniGridEnv(gym.Env):
         Generate the agent's view (partially observable, low-resolution encoding)
         """
 
-        grid, vis_mask = self.gen_obs_grid()
+        assert hasattr(self, 'mission'), "environments must define a textual mission string"
 
-        # Encode the partially observable view into a numpy array
-        image = grid.encode(vis_mask)
+        # Generate the image only when it is read
+        if self.obs_mode == 'lazy':
+            return LazyObs(
+                self,
+                direction=self.agent_dir,
+                mission=self.mission
+            )
 
-        assert hasattr(self, 'mission'), "environments must define a textual mission string"
+        # Leave the partial view out
+        if self.obs_mode == 'none':
+            return {
+                'direction': self.agent_dir,
+                'mission': self.mission
+            }
+
+        # Fill the observation buffer in place, if one was given
+        if self.obs_buffer is not None:
+            obs = self.obs_buffer
+            self.gen_obs_image(out=obs['image'])
+            obs['direction'] = self.agent_dir
+            obs['mission'] = self.mission
+            return obs
+
+        # Encode the partially observable view into a numpy array
+        image = self.gen_obs_image()
 
         # Observations are dictionaries containing:
         # - an image (partially observable view of the environment)
@@ -1285,9 +1868,55 @@ class MiniGridEnv(gym.Env):
 
         return obs
 
+    def gen_obs_image(self, out=None):
+        """
+        Encode the partially observable view of the agent
+        """
+
+        grid, vis_mask = self.gen_obs_grid()
+        return grid.encode(vis_mask, out=out)
+
+    def set_obs_mode(self, mode):
+        """
+        Choose how gen_obs, and so step and reset, produce the partial view:
+        - 'partial': generate it on every step (the default)
+        - 'lazy': return a LazyObs, which generates it when read
+        - 'none': leave the image out of observations
+        """
+
+        assert mode in self.OBS_MODES, "unknown observation mode '%s'" % mode
+        self.obs_mode = mode
+
+    def set_obs_buffer(self, image=None):
+        """
+        Have gen_obs, and so step and reset, write observations into the
+        given image array (for instance one slot of a batch array) and
+        return the same dictionary every time, instead of allocating new
+        ones. The observation is then overwritten by the next step.
+        Passing None allocates a new observation on every step again.
+        """
+
+        if image is None:
+            self.obs_buffer = None
+            return None
+
+        assert isinstance(image, np.ndarray) and image.dtype == np.uint8
+        # The view size can be changed after construction, see AgentViewWrapper
+        size = self.agent_view_size
+        assert image.shape == (size, size, 3)
+
+        self.obs_buffer = {
+            'image': image,
+            'direction': getattr(self, 'agent_dir', None),
+            'mission': getattr(self, 'mission', None)
+        }
+
+        return self.obs_buffer
+
     def get_obs_render(self, obs, tile_pixels=CELL_PIXELS//2):
         """
         Render an agent observation for visualization
+        See raster.render_obs to get an array of pixels without Qt
         """
 
         if self.obs_render == None:
@@ -1328,9 +1957,40 @@ class MiniGridEnv(gym.Env):
 
         return r.getPixmap()
 
-    def render(self, mode='human', close=False):
+    def gen_vis_mask(self):
+        """
+        Compute which cells of the grid are visible to the agent,
+        as a (width, height) boolean mask
+        """
+
+        _, vis_mask = self.gen_obs_grid()
+
+        # Compute the absolute coordinates of the bottom-left corner
+        # of the agent's view area
+        f_vec = self.dir_vec
+        r_vec = self.right_vec
+        top_left = self.agent_pos + f_vec * (self.agent_view_size-1) - r_vec * (self.agent_view_size // 2)
+
+        # World coordinates of the visible cells
+        vis_i, vis_j = np.nonzero(vis_mask)
+        abs_i = top_left[0] - f_vec[0] * vis_j + r_vec[0] * vis_i
+        abs_j = top_left[1] - f_vec[1] * vis_j + r_vec[1] * vis_i
+        inside = (abs_i >= 0) & (abs_i < self.width) & \
+            (abs_j >= 0) & (abs_j < self.height)
+
+        mask = np.zeros((self.width, self.height), dtype=bool)
+        mask[abs_i[inside], abs_j[inside]] = True
+
+        return mask
+
+    def render(self, mode='human', close=False, backend=None):
         """
         Render the whole-grid human view
+        :param backend: 'qt' to draw with PyQt5, or 'numpy' to compose
+        the frame from tiles rasterized with NumPy, only redrawing the
+        cells which changed since the last frame. The numpy backend only
+        uses Qt to show frames in 'human' mode, and doesn't support the
+        'pixmap' mode. Defaults to the render_backend attribute.
         """
 
         if close:
@@ -1338,6 +1998,43 @@ class MiniGridEnv(gym.Env):
                 self.grid_render.close()
             return
 
+        if backend is None:
+            backend = self.render_backend
+        assert backend in ('qt', 'numpy'), "unknown backend '%s'" % backend
+
+        if backend == 'numpy':
+            assert mode in ('human', 'rgb_array'), \
+                "the numpy backend can't render in mode '%s'" % mode
+
+            if self.frame_render is None:
+                from gym_minigrid.raster import FrameRenderer
+                self.frame_render = FrameRenderer(CELL_PIXELS)
+
+            frame = self.frame_render.render(
+                self.grid,
+                agent_pos=self.agent_pos,
+                agent_dir=self.agent_dir,
+                highlight=self.gen_vis_mask()
+            )
+
+            if mode == 'rgb_array':
+                return frame.copy()
+
+            if self.grid_render is None:
+                from gym_minigrid.rendering import Renderer
+                self.grid_render = Renderer(
+                    self.width * CELL_PIXELS,
+                    self.height * CELL_PIXELS,
+                    True
+                )
+
+            r = self.grid_render
+            if r.window:
+                r.window.setText(self.mission)
+            r.setArray(frame)
+
+            return r
+
         if self.grid_render is None:
             from gym_minigrid.rendering import Renderer
             self.grid_render = Renderer(
@@ -1372,38 +2069,20 @@ class MiniGridEnv(gym.Env):
         ])
         r.pop()
 
-        # Compute which cells are visible to the agent
-        _, vis_mask = self.gen_obs_grid()
-
-        # Compute the absolute coordinates of the bottom-left corner
-        # of the agent's view area
-        f_vec = self.dir_vec
-        r_vec = self.right_vec
-        top_left = self.agent_pos + f_vec * (self.agent_view_size-1) - r_vec * (self.agent_view_size // 2)
-
-        # For each cell in the visibility mask
-        for vis_j in range(0, self.agent_view_size):
-            for vis_i in range(0, self.agent_view_size):
-                # If this cell is not visible, don't highlight it
-                if not vis_mask[vis_i, vis_j]:
-                    continue
-
-                # Compute the world coordinates of this cell
-                abs_i, abs_j = top_left - (f_vec * vis_j) + (r_vec * vis_i)
-
-                # Highlight the cell
-                r.fillRect(
-                    abs_i * CELL_PIXELS,
-                    abs_j * CELL_PIXELS,
-                    CELL_PIXELS,
-                    CELL_PIXELS,
-                    255, 255, 255, 75
-                )
+        # Highlight the cells visible to the agent
+        for abs_i, abs_j in np.argwhere(self.gen_vis_mask()).tolist():
+            r.fillRect(
+                abs_i * CELL_PIXELS,
+                abs_j * CELL_PIXELS,
+                CELL_PIXELS,
+                CELL_PIXELS,
+                255, 255, 255, 75
+            )
 
         r.endFrame()
 
         if mode == 'rgb_array':
-            return r.getArray()
+            return r.getArray().copy()
         elif mode == 'pixmap':
             return r.getPixmap()
 
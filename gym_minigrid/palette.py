@@ -0,0 +1,149 @@
+import numpy as np
+
+# Number of colors beyond the named ones
+N_SUPPLEMENTARY_COLOR = 100
+
+# Map of color names to RGB values
+# The supplementary colors are spread around the hue circle by steps of
+# the golden ratio, with cycling saturations and values, so that they are
+# all distinct, and the same in every process
+COLORS = {
+    'grey': np.array([100, 100, 100]),
+    'red'   : np.array([255, 0, 0]),
+    'green' : np.array([0, 255, 0]),
+    'blue'  : np.array([0, 0, 255]),
+    'purple': np.array([112, 39, 195]),
+    'yellow': np.array([255, 255, 0]),
+    'pink'  : np.array([255, 0, 144]),
+    'brown' : np.array([93, 67, 44]),
+    'lblue' : np.array([115, 194, 251]),
+    'lgreen': np.array([152, 251, 152]),
+    'color10': np.array([242, 12, 12]),
+    'color11': np.array([57, 96, 191]),
+    'color12': np.array([111, 140, 70]),
+    'color13': np.array([217, 11, 191]),
+    'color14': np.array([73, 242, 214]),
+    'color15': np.array([191, 147, 96]),
+    'color16': np.array([40, 7, 140]),
+    'color17': np.array([71, 217, 65]),
+    'color18': np.array([242, 121, 162]),
+    'color19': np.array([10, 123, 191]),
+    'color20': np.array([132, 140, 42]),
+    'color21': np.array([194, 108, 217]),
+    'color22': np.array([12, 242, 127]),
+    'color23': np.array([191, 85, 57]),
+    'color24': np.array([70, 76, 140]),
+    'color25': np.array([88, 217, 11]),
+    'color26': np.array([242, 73, 186]),
+    'color27': np.array([96, 187, 191]),
+    'color28': np.array([140, 107, 7]),
+    'color29': np.array([134, 65, 217]),
+    'color30': np.array([121, 242, 141]),
+    'color31': np.array([191, 10, 33]),
+    'color32': np.array([42, 83, 140]),
+    'color33': np.array([185, 217, 108]),
+    'color34': np.array([242, 12, 242]),
+    'color35': np.array([57, 191, 152]),
+    'color36': np.array([140, 99, 70]),
+    'color37': np.array([36, 11, 217]),
+    'color38': np.array([102, 242, 73]),
+    'color39': np.array([191, 96, 140]),
+    'color40': np.array([7, 107, 140]),
+    'color41': np.array([217, 210, 65]),
+    'color42': np.array([201, 121, 242]),
+    'color43': np.array([10, 191, 77]),
+    'color44': np.array([140, 50, 42]),
+    'color45': np.array([108, 131, 217]),
+    'color46': np.array([128, 242, 12]),
+    'color47': np.array([191, 57, 164]),
+    'color48': np.array([70, 140, 134]),
+    'color49': np.array([217, 138, 11]),
+    'color50': np.array([128, 73, 242]),
+    'color51': np.array([96, 191, 99]),
+    'color52': np.array([140, 7, 41]),
+    'color53': np.array([65, 148, 217]),
+    'color54': np.array([223, 242, 121]),
+    'color55': np.array([167, 10, 191]),
+    'color56': np.array([42, 140, 99]),
+    'color57': np.array([217, 139, 108]),
+    'color58': np.array([12, 14, 242]),
+    'color59': np.array([97, 191, 57]),
+    'color60': np.array([140, 70, 111]),
+    'color61': np.array([11, 192, 217]),
+    'color62': np.array([242, 213, 73]),
+    'color63': np.array([147, 96, 191]),
+    'color64': np.array([7, 140, 39]),
+    'color65': np.array([217, 65, 72]),
+    'color66': np.array([121, 162, 242]),
+    'color67': np.array([124, 191, 10]),
+    'color68': np.array([140, 42, 133]),
+    'color69': np.array([108, 217, 193]),
+    'color70': np.array([242, 125, 12]),
+    'color71': np.array([84, 57, 191]),
+    'color72': np.array([77, 140, 70]),
+    'color73': np.array([217, 11, 90]),
+    'color74': np.array([73, 187, 242]),
+    'color75': np.array([188, 191, 96]),
+    'color76': np.array([106, 7, 140]),
+    'color77': np.array([65, 217, 133]),
+    'color78': np.array([242, 140, 121]),
+    'color79': np.array([10, 34, 191]),
+    'color80': np.array([84, 140, 42]),
+    'color81': np.array([217, 108, 186]),
+    'color82': np.array([12, 242, 240]),
+    'color83': np.array([191, 151, 57]),
+    'color84': np.array([99, 70, 140]),
+    'color85': np.array([11, 217, 35]),
+    'color86': np.array([242, 73, 103]),
+    'color87': np.array([96, 140, 191]),
+    'color88': np.array([108, 140, 7]),
+    'color89': np.array([209, 65, 217]),
+    'color90': np.array([121, 242, 201]),
+    'color91': np.array([191, 76, 10]),
+    'color92': np.array([49, 42, 140]),
+    'color93': np.array([132, 217, 108]),
+    'color94': np.array([242, 12, 130]),
+    'color95': np.array([57, 165, 191]),
+    'color96': np.array([140, 134, 70]),
+    'color97': np.array([137, 11, 217]),
+    'color98': np.array([73, 242, 127]),
+    'color99': np.array([191, 99, 96]),
+    'color100': np.array([7, 42, 140]),
+    'color101': np.array([149, 217, 65]),
+    'color102': np.array([242, 121, 224]),
+    'color103': np.array([10, 191, 166]),
+    'color104': np.array([140, 98, 42]),
+    'color105': np.array([139, 108, 217]),
+    'color106': np.array([15, 242, 12]),
+    'color107': np.array([191, 57, 98]),
+    'color108': np.array([70, 112, 140]),
+    'color109': np.array([194, 217, 11]),
+}
+
+COLOR_NAMES = sorted(list(COLORS.keys()))
+
+# Used to map colors to integers
+COLOR_TO_IDX = {
+    'grey'  : 0,
+    'green' : 1,
+    'blue'  : 2,
+    'purple': 3,
+    'yellow': 4,
+    'red'   : 5,
+    'pink'  : 6,
+    'brown' : 7,
+    'lblue' : 8,
+    'lgreen': 9
+}
+
+COLOR_TO_IDX.update({
+    'color' + str(i): i for i in range(len(COLOR_TO_IDX), len(COLORS))
+})
+
+IDX_TO_COLOR = dict(zip(COLOR_TO_IDX.values(), COLOR_TO_IDX.keys()))
+
+# RGB values of the colors, indexed by color index
+COLOR_ARRAY = np.array(
+    [COLORS[IDX_TO_COLOR[idx]] for idx in range(len(COLORS))],
+    dtype='uint8'
+)
@@ -0,0 +1,130 @@
+import threading
+import numpy as np
+import gym
+from .minigrid import deferred_reset
+
+class EnvPool:
+    """
+    Pool of environment instances, to reuse environments instead of
+    making new ones with gym.make.
+
+    Environments are keyed on their id and constructor arguments. An
+    instance checked out of the pool is reset, and goes back to the pool
+    once released. New instances are made with deferred_reset, since
+    they are reset on checkout anyway.
+
+    With obs_buffers, instances write their observations into an image
+    buffer owned by the pool (see MiniGridEnv.set_obs_buffer), and the
+    buffers of discarded instances are given to new ones of the same
+    observation shape. At most max_free released instances of each key
+    are kept, the others are closed.
+    """
+
+    def __init__(self, max_free=None, obs_buffers=False):
+        assert max_free is None or max_free >= 0
+        self.max_free = max_free
+        self.obs_buffers = obs_buffers
+
+        # Released instances, by key
+        self.free = {}
+
+        # Key of the checked out instances, by id
+        self.live = {}
+
+        # Image buffers of discarded instances, by shape
+        self.free_buffers = {}
+
+        # Checkouts served by a released instance, and by a new one
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(env_id, **kwargs):
+        return (env_id, tuple(sorted(kwargs.items())))
+
+    @property
+    def num_live(self):
+        return len(self.live)
+
+    @property
+    def num_free(self):
+        return sum(len(envs) for envs in self.free.values())
+
+    def _make(self, env_id, kwargs):
+        """
+        Make a new instance, without generating a first level
+        """
+
+        with deferred_reset():
+            env = gym.make(env_id, **kwargs)
+
+        if self.obs_buffers:
+            shape = env.unwrapped.observation_space.spaces['image'].shape
+            buffers = self.free_buffers.get(shape)
+            if buffers:
+                image = buffers.pop()
+            else:
+                image = np.zeros(shape, dtype='uint8')
+            env.unwrapped.set_obs_buffer(image)
+
+        return env
+
+    def checkout(self, env_id, seed=None, **kwargs):
+        """
+        Get an instance of environment env_id made with the given keyword
+        arguments, reset with the given seed if any. Returns the
+        environment and its first observation.
+        """
+
+        key = self.key(env_id, **kwargs)
+
+        with self.lock:
+            envs = self.free.get(key)
+            if envs:
+                env = envs.pop()
+                self.hits += 1
+            else:
+                env = self._make(env_id, kwargs)
+                self.misses += 1
+            self.live[id(env)] = key
+
+        if seed is not None:
+            env.seed(seed)
+        obs = env.reset()
+
+        return env, obs
+
+    def release(self, env):
+        """
+        Give an instance obtained from checkout back to the pool
+        """
+
+        with self.lock:
+            assert id(env) in self.live, "environment not checked out"
+            key = self.live.pop(id(env))
+
+            envs = self.free.setdefault(key, [])
+            if self.max_free is None or len(envs) < self.max_free:
+                envs.append(env)
+            else:
+                self._discard(env)
+
+    def _discard(self, env):
+        image = env.unwrapped.obs_buffer
+        if self.obs_buffers and image is not None:
+            image = image['image']
+            self.free_buffers.setdefault(image.shape, []).append(image)
+        env.close()
+
+    def close(self):
+        """
+        Close the released instances
+        """
+
+        with self.lock:
+            for envs in self.free.values():
+                for env in envs:
+                    self._discard(env)
+            self.free.clear()
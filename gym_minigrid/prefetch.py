@@ -0,0 +1,171 @@
+import copy
+import threading
+from collections import deque
+from multiprocessing.pool import Pool, ThreadPool
+import numpy as np
+
+# Environment used to generate levels, one per worker
+_worker = threading.local()
+
+def _init_worker(env, processes):
+    _worker.env = copy.deepcopy(env)
+
+    # Snapshots sent back by processes are pickled copies, those of
+    # threads refer to the objects of the worker environment
+    _worker.copy_states = not processes
+
+    # The first observation of generated levels is never used
+    _worker.env.set_obs_mode('lazy')
+
+def _gen_level(seed=None, rng_state=None, start=None):
+    """
+    Generate a level in a worker and return a snapshot of it
+    """
+
+    env = _worker.env
+
+    if seed is not None:
+        env.seed(seed)
+    if rng_state is not None:
+        env.np_random.set_state(rng_state[0])
+        env.rng.set_state(rng_state[1])
+    if start is not None:
+        env.start_pos, env.start_dir = start
+
+    env.reset()
+
+    state = env.get_state()
+    if _worker.copy_states:
+        state = copy.deepcopy(state)
+    state['owner'] = None
+
+    return state
+
+def _rng_state(env):
+    return env.np_random.get_state(), env.rng.get_state()
+
+def _same_rng_state(a, b):
+    (a_np, a_buffer), (b_np, b_buffer) = a, b
+    return a_np[0] == b_np[0] and np.array_equal(a_np[1], b_np[1]) and \
+        a_np[2:] == b_np[2:] and a_buffer == b_buffer
+
+class LevelPrefetcher:
+    """
+    Generate the upcoming levels of an environment in background workers,
+    and keep them in a bounded queue of snapshots.
+
+    With a list of seeds, levels are generated for these seeds in turn,
+    cycling through the list as ReseedWrapper does. Without seeds, a
+    single worker continues the random number stream of the environment.
+    If the environment draws random numbers between resets, or is
+    reseeded, the queued levels are discarded and generation starts again
+    from its current stream.
+
+    Either way, the levels are identical to those which reset would have
+    generated. Version 1 generators avoid the starting position of the
+    level before (see MiniGridEnv.gen_version), so their levels are
+    generated in order by a single worker, which carries the starting
+    position from one level to the next. Only the levels of version 2
+    generators are generated by several workers at once. Workers are
+    threads, or processes if processes is True.
+    """
+
+    def __init__(
+        self,
+        env,
+        seeds=None,
+        num_workers=1,
+        queue_size=8,
+        processes=False
+    ):
+        assert queue_size > 0
+
+        self.env = env.unwrapped
+        self.seeds = None if seeds is None else list(seeds)
+
+        # The stream of a deferred environment starts from its initial seed
+        if self.env.np_random is None:
+            self.env.seed(self.env.init_seed)
+        self.seed_idx = 0
+        self.queue_size = queue_size
+
+        # A stream of levels has to be generated in order, and so do the
+        # levels of version 1 generators, which depend on the level before
+        if self.seeds is None or self.env.gen_version < 2:
+            num_workers = 1
+
+        # Workers get their own copy of the environment, made here while
+        # it isn't being stepped
+        env_copy = copy.copy(self.env)
+        env_copy.grid_render = None
+        env_copy.obs_render = None
+        env_copy.frame_render = None
+        env_copy.obs_buffer = None
+        env_copy = copy.deepcopy(env_copy)
+
+        pool_class = Pool if processes else ThreadPool
+        self.pool = pool_class(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(env_copy, processes)
+        )
+
+        self.queue = deque()
+        self.expected_rng = None
+        self._fill()
+
+    def _fill(self):
+        """
+        Submit levels to generate until the queue is full
+        """
+
+        while len(self.queue) < self.queue_size:
+            if self.seeds is not None:
+                seed = self.seeds[self.seed_idx]
+                self.seed_idx = (self.seed_idx + 1) % len(self.seeds)
+                result = self.pool.apply_async(_gen_level, (seed,))
+            elif self.expected_rng is None:
+                # Start the stream from the current state of the environment.
+                # Levels still being generated for the discarded stream may
+                # change the starting position of the worker, so pass it too.
+                self.expected_rng = _rng_state(self.env)
+                start = (self.env.start_pos, self.env.start_dir)
+                result = self.pool.apply_async(
+                    _gen_level,
+                    (None, self.expected_rng, start)
+                )
+            else:
+                result = self.pool.apply_async(_gen_level)
+            self.queue.append(result)
+
+    def _restart(self):
+        """
+        Discard the queued levels
+        """
+
+        self.queue.clear()
+        self.expected_rng = None
+
+    def next_state(self):
+        """
+        Get the snapshot of the next level, waiting for it if needed
+        """
+
+        if self.seeds is None:
+            if not _same_rng_state(_rng_state(self.env), self.expected_rng):
+                self._restart()
+                self._fill()
+
+        state = self.queue.popleft().get()
+
+        if self.seeds is None:
+            self.expected_rng = (state['rng'], state['rng_buffer'])
+
+        self._fill()
+
+        return state
+
+    def close(self):
+        self._restart()
+        self.pool.terminate()
+        self.pool.join()
@@ -0,0 +1,522 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from .minigrid import CELL_PIXELS, WorldObj
+
+class Rasterizer:
+    """
+    Drawing surface with the interface of rendering.Renderer, which
+    rasterizes shapes into a NumPy array without antialiasing, so that
+    objects can be rendered without Qt. As with Qt, pixel (x, y) samples
+    the point (x, y): it is filled when that point is inside a shape, and
+    stroked when it is within half the line width of a line.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+        self.array = np.zeros((height, width, 3), dtype='uint8')
+
+        # Rasterizers never have a window
+        self.window = None
+
+        self.beginFrame()
+
+    def close(self):
+        pass
+
+    def beginFrame(self):
+        self.array[:] = 0
+
+        # Transform from drawing to pixel coordinates, line color, fill
+        # color and line width, saved by push
+        self.matrix = np.eye(3)
+        self.line_color = (0, 0, 0, 255)
+        self.color = (0, 0, 0, 255)
+        self.line_width = 1
+        self.stack = []
+
+    def endFrame(self):
+        pass
+
+    def getArray(self):
+        """
+        Get a numpy array of RGB pixel values.
+        The array will have shape (height, width, 3)
+        """
+
+        return self.array
+
+    def push(self):
+        self.stack.append(
+            (self.matrix, self.line_color, self.color, self.line_width)
+        )
+
+    def pop(self):
+        self.matrix, self.line_color, self.color, self.line_width = \
+            self.stack.pop()
+
+    def _transform(self, m):
+        self.matrix = self.matrix.dot(m)
+
+    def rotate(self, degrees):
+        c = math.cos(math.radians(degrees))
+        s = math.sin(math.radians(degrees))
+        self._transform(np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]]))
+
+    def translate(self, x, y):
+        self._transform(np.array([[1, 0, x], [0, 1, y], [0, 0, 1]]))
+
+    def scale(self, x, y):
+        self._transform(np.array([[x, 0, 0], [0, y, 0], [0, 0, 1]]))
+
+    def setLineColor(self, r, g, b, a=255):
+        self.line_color = (r, g, b, a)
+
+    def setColor(self, r, g, b, a=255):
+        self.color = (r, g, b, a)
+
+    def setLineWidth(self, width):
+        self.line_width = width
+
+    def drawLine(self, x0, y0, x1, y1):
+        self._stroke([(x0, y0), (x1, y1)], closed=False)
+
+    def drawCircle(self, x, y, r):
+        (cx, cy), = self._points([(x, y)])
+        r = r * self._scale()
+
+        def inside(px, py):
+            return (px - cx) ** 2 + (py - cy) ** 2 <= r ** 2
+
+        def on_line(px, py, half):
+            return np.abs(np.hypot(px - cx, py - cy) - r) <= half
+
+        extent = (cx - r - 1, cy - r - 1, cx + r + 1, cy + r + 1)
+        self._paint(extent, inside, self.color)
+        self._paint(extent, lambda px, py: on_line(px, py, self._half_width()),
+            self.line_color)
+
+    def drawPolygon(self, points):
+        """Takes a list of points (tuples) as input"""
+        pts = self._points(points)
+
+        def inside(px, py):
+            # Even-odd rule, as with Qt's default fill rule
+            result = np.zeros(np.broadcast(px, py).shape, dtype=bool)
+            for (x0, y0), (x1, y1) in zip(pts, np.roll(pts, -1, axis=0)):
+                if y0 == y1:
+                    continue
+                crosses = (y0 > py) != (y1 > py)
+                x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+                result ^= crosses & (px < x)
+            return result
+
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        self._paint((lo[0], lo[1], hi[0], hi[1]), inside, self.color)
+        self._stroke(points, closed=True)
+
+    def drawPolyline(self, points):
+        """Takes a list of points (tuples) as input"""
+        self._stroke(points, closed=False)
+
+    def fillRect(self, x, y, width, height, r, g, b, a=255):
+        line_color = self.line_color
+        color = self.color
+        self.line_color = (0, 0, 0, 0)
+        self.color = (r, g, b, a)
+        self.drawPolygon([
+            (x        , y         ),
+            (x + width, y         ),
+            (x + width, y + height),
+            (x        , y + height)
+        ])
+        self.line_color = line_color
+        self.color = color
+
+    def _points(self, points):
+        """
+        Transform points into pixel coordinates
+        """
+
+        pts = np.array(points, dtype=float).reshape(-1, 2)
+        return pts.dot(self.matrix[:2, :2].T) + self.matrix[:2, 2]
+
+    def _scale(self):
+        return math.sqrt(abs(np.linalg.det(self.matrix[:2, :2])))
+
+    def _half_width(self):
+        # Lines are at least one pixel wide
+        return max(self.line_width * self._scale(), 1) / 2
+
+    def _stroke(self, points, closed):
+        """
+        Draw the lines joining a list of points with the line color
+        """
+
+        pts = self._points(points)
+        if closed:
+            pts = np.concatenate([pts, pts[:1]])
+        half = self._half_width()
+
+        for (x0, y0), (x1, y1) in zip(pts[:-1], pts[1:]):
+            dx, dy = x1 - x0, y1 - y0
+            length2 = dx * dx + dy * dy
+
+            def on_line(px, py):
+                if length2 == 0:
+                    t = 0
+                else:
+                    t = ((px - x0) * dx + (py - y0) * dy) / length2
+                    t = np.clip(t, 0, 1)
+                return np.hypot(px - x0 - t * dx, py - y0 - t * dy) <= half
+
+            extent = (
+                min(x0, x1) - half, min(y0, y1) - half,
+                max(x0, x1) + half, max(y0, y1) + half
+            )
+            self._paint(extent, on_line, self.line_color)
+
+    def _paint(self, extent, covers, color):
+        """
+        Blend a color into the pixels of an extent (x0, y0, x1, y1) whose
+        sample points are covered by a shape
+        """
+
+        r, g, b, a = color
+        if a == 0:
+            return
+
+        x0 = max(int(math.floor(extent[0])), 0)
+        y0 = max(int(math.floor(extent[1])), 0)
+        x1 = min(int(math.ceil(extent[2])) + 1, self.width)
+        y1 = min(int(math.ceil(extent[3])) + 1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        px = np.arange(x0, x1)[None, :].astype(float)
+        py = np.arange(y0, y1)[:, None].astype(float)
+        mask = np.broadcast_to(covers(px, py), (y1 - y0, x1 - x0))
+
+        region = self.array[y0:y1, x0:x1]
+        if a == 255:
+            region[mask] = (r, g, b)
+        else:
+            pixels = region[mask].astype(np.uint32)
+            pixels = (pixels * (255 - a) + np.array((r, g, b)) * a + 127) // 255
+            region[mask] = pixels
+
+def render_tile(obj, tile_size=CELL_PIXELS, agent_dir=None, highlight=False):
+    """
+    Rasterize the tile of one grid cell, with its grid lines, the
+    object in it if any, and the agent if it faces agent_dir. The tile
+    is lightened if highlighted, as cells visible to the agent are.
+    """
+
+    r = Rasterizer(tile_size, tile_size)
+    r.scale(tile_size / CELL_PIXELS, tile_size / CELL_PIXELS)
+
+    # Grid lines on the top and left sides
+    r.setLineColor(100, 100, 100)
+    r.drawLine(0, 0, CELL_PIXELS, 0)
+    r.drawLine(0, 0, 0, CELL_PIXELS)
+
+    if obj is not None:
+        r.push()
+        obj.render(r)
+        r.pop()
+
+    if agent_dir is not None:
+        r.push()
+        r.translate(CELL_PIXELS * 0.5, CELL_PIXELS * 0.5)
+        r.rotate(agent_dir * 90)
+        r.setLineColor(255, 0, 0)
+        r.setColor(255, 0, 0)
+        r.drawPolygon([
+            (-12, 10),
+            ( 12,  0),
+            (-12, -10)
+        ])
+        r.pop()
+
+    if highlight:
+        r.fillRect(0, 0, CELL_PIXELS, CELL_PIXELS, 255, 255, 255, 75)
+
+    return r.getArray()
+
+def tile_keys(array, agent_pos=None, agent_dir=None, highlight=None):
+    """
+    Pack the encoding of each cell of a (width, height, 3) grid array,
+    the direction of the agent in its cell, and whether the cell is in
+    the highlight mask, into one integer key
+    """
+
+    keys = array[:, :, 0].astype(np.int32)
+    keys |= array[:, :, 1].astype(np.int32) << 8
+    keys |= array[:, :, 2].astype(np.int32) << 16
+    if agent_pos is not None:
+        keys[tuple(agent_pos)] |= (agent_dir + 1) << 24
+    if highlight is not None:
+        keys[highlight] |= 1 << 27
+    return keys
+
+def _key_tile(key, tile_size, obj=None):
+    """
+    Rasterize the tile of a key, decoding its object unless given
+    """
+
+    type_idx, color_idx, state = key & 0xFF, (key >> 8) & 0xFF, (key >> 16) & 0xFF
+    if obj is None:
+        obj = WorldObj.decode(type_idx, color_idx, state)
+    agent_dir = ((key >> 24) & 0x7) - 1
+    if agent_dir < 0:
+        agent_dir = None
+    return render_tile(obj, tile_size, agent_dir, bool(key >> 27))
+
+class TileAtlas:
+    """
+    Least recently used cache of rasterized tiles, keyed on the packed
+    key of a cell (object type, color and state, agent direction and
+    highlight, see tile_keys) and the tile size. Each combination is
+    rasterized once, and frames are then assembled by copying tiles.
+    """
+
+    def __init__(self, max_tiles=2048):
+        assert max_tiles > 0
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+
+        # Lookups served from the cache, and tiles rasterized
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __contains__(self, entry):
+        return entry in self.tiles
+
+    def get(self, key, tile_size, obj=None):
+        """
+        Get the tile of a key, rasterizing it on a miss, with the given
+        object or else the object decoded from the key
+        """
+
+        entry = (key, tile_size)
+        tile = self.tiles.get(entry)
+        if tile is not None:
+            self.tiles.move_to_end(entry)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        tile = _key_tile(key, tile_size, obj)
+        tile.flags.writeable = False
+        self.tiles[entry] = tile
+        if len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def clear(self):
+        self.tiles.clear()
+
+# Atlas shared by all renders which aren't given one
+ATLAS = TileAtlas()
+
+def render_grid(grid, tile_size=CELL_PIXELS, agent_pos=None, agent_dir=None,
+        highlight=None, atlas=None):
+    """
+    Render a grid, and the agent if its position is given, into a new
+    (height * tile_size, width * tile_size, 3) RGB array. The tiles of
+    the cells are taken from a TileAtlas, the shared one by default, and
+    copied into place. Cells in the (width, height) highlight mask are
+    lightened.
+    """
+
+    return render_batch(
+        [grid],
+        tile_size,
+        None if agent_pos is None else [agent_pos],
+        None if agent_dir is None else [agent_dir],
+        None if highlight is None else [highlight],
+        atlas=atlas
+    )[0]
+
+def render_batch(grids, tile_size=CELL_PIXELS, agent_pos=None, agent_dir=None,
+        highlight=None, out=None, atlas=None):
+    """
+    Render N grids of the same size into one (N, height * tile_size,
+    width * tile_size, 3) RGB array, in a single pass which shares the
+    tiles of all grids. Grids are given as a list of Grid objects or as a
+    (N, width, height, 3) array of encoded cells, along with the optional
+    (N, 2) agent positions, N agent directions and (N, width, height)
+    highlight masks. The frames are written into out if given.
+    """
+
+    if atlas is None:
+        atlas = ATLAS
+
+    if isinstance(grids, np.ndarray):
+        array = grids
+        grids = None
+    else:
+        array = np.stack([grid.array for grid in grids])
+    n, width, height, _ = array.shape
+
+    keys = array[..., 0].astype(np.int32)
+    keys |= array[..., 1].astype(np.int32) << 8
+    keys |= array[..., 2].astype(np.int32) << 16
+    if agent_pos is not None:
+        agent_pos = np.asarray(agent_pos)
+        agent_dir = np.asarray(agent_dir)
+        keys[np.arange(n), agent_pos[:, 0], agent_pos[:, 1]] |= \
+            (agent_dir.astype(np.int32) + 1) << 24
+    if highlight is not None:
+        keys[np.asarray(highlight)] |= 1 << 27
+
+    unique, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(keys.shape)
+
+    tiles = []
+    objs = None
+    for key in unique.tolist():
+        # Objects with an identity are rendered themselves, in case their
+        # class draws them differently from the decoded object
+        if objs is None and grids is not None and (key, tile_size) not in atlas:
+            objs = {}
+            for k, grid in enumerate(grids):
+                for pos, obj in grid.objs.items():
+                    objs.setdefault(int(keys[(k,) + pos]), obj)
+        obj = objs.get(key) if objs is not None else None
+        tiles.append(atlas.get(key, tile_size, obj))
+    tiles = np.stack(tiles)
+
+    if out is None:
+        out = np.empty((n, height * tile_size, width * tile_size, 3), dtype='uint8')
+    assert out.shape == (n, height * tile_size, width * tile_size, 3)
+    assert out.dtype == np.uint8 and out.flags.c_contiguous
+
+    # Copy rows of tile pixels straight into the frames, indexed by
+    # (grid, cell row, tile row, cell column)
+    rows = tiles.reshape(len(tiles) * tile_size, tile_size, 3)
+    idx = inverse.transpose(0, 2, 1)[:, :, None, :] * tile_size + \
+        np.arange(tile_size)[None, None, :, None]
+    np.take(
+        rows,
+        idx,
+        axis=0,
+        out=out.reshape(n, height, tile_size, width, tile_size, 3),
+        mode='clip'
+    )
+
+    return out
+
+def render_envs(envs, tile_size=CELL_PIXELS, highlight=True, out=None,
+        atlas=None):
+    """
+    Render the whole-grid views of N environments of the same size into
+    one (N, height, width, 3) RGB array, as render_batch does, with the
+    cells visible to each agent highlighted unless highlight is False
+    """
+
+    envs = [env.unwrapped for env in envs]
+
+    return render_batch(
+        [env.grid for env in envs],
+        tile_size,
+        agent_pos=[env.agent_pos for env in envs],
+        agent_dir=[env.agent_dir for env in envs],
+        highlight=[env.gen_vis_mask() for env in envs] if highlight else None,
+        out=out,
+        atlas=atlas
+    )
+
+def render_obs(image, tile_size=CELL_PIXELS // 2, out=None, atlas=None):
+    """
+    Render an encoded partial view, or an (N, view, view, 3) batch of
+    them, into RGB pixels by tile lookup, with the agent at the bottom
+    center of the view facing up, as get_obs_render draws it
+    """
+
+    batch = np.asarray(image)
+    if batch.ndim == 3:
+        batch = batch[None]
+        if out is not None:
+            out = out[None]
+    n, width, height, _ = batch.shape
+
+    frames = render_batch(
+        batch,
+        tile_size,
+        agent_pos=np.tile((width // 2, height - 1), (n, 1)),
+        agent_dir=np.full(n, 3),
+        out=out,
+        atlas=atlas
+    )
+
+    return frames if np.ndim(image) == 4 else frames[0]
+
+class FrameRenderer:
+    """
+    Renderer which keeps the last frame it rendered, and only copies the
+    tiles of the cells whose key changed since, such as the cells the
+    agent left and entered, toggled doors, objects picked up or dropped,
+    and cells entering or leaving the agent's view.
+    """
+
+    def __init__(self, tile_size=CELL_PIXELS, atlas=None):
+        self.tile_size = tile_size
+        self.atlas = ATLAS if atlas is None else atlas
+
+        # Last frame, and the keys of its cells
+        self.frame = None
+        self.keys = None
+
+        # Number of tiles copied by the last render
+        self.num_drawn = 0
+
+    def render(self, grid, agent_pos=None, agent_dir=None, highlight=None):
+        """
+        Render a grid like render_grid, updating the last frame in place.
+        The returned array is overwritten by the next render.
+        """
+
+        keys = tile_keys(grid.array, agent_pos, agent_dir, highlight)
+
+        if self.keys is None or self.keys.shape != keys.shape:
+            self.frame = render_grid(
+                grid,
+                self.tile_size,
+                agent_pos,
+                agent_dir,
+                highlight,
+                self.atlas
+            )
+            self.keys = keys
+            self.num_drawn = keys.size
+            return self.frame
+
+        ts = self.tile_size
+        changed_i, changed_j = np.nonzero(keys != self.keys)
+        if len(changed_i) > 0:
+            unique, first, inverse = np.unique(
+                keys[changed_i, changed_j],
+                return_index=True,
+                return_inverse=True
+            )
+            tiles = []
+            for key, k in zip(unique.tolist(), first.tolist()):
+                obj = None
+                if (key, ts) not in self.atlas:
+                    obj = grid.objs.get((int(changed_i[k]), int(changed_j[k])))
+                tiles.append(self.atlas.get(key, ts, obj))
+            tiles = np.stack(tiles)
+
+            # Copy the tiles of all changed cells at once
+            cells = self.frame.reshape(grid.height, ts, grid.width, ts, 3)
+            cells[changed_j, :, changed_i] = tiles[inverse]
+
+        self.keys = keys
+        self.num_drawn = len(changed_i)
+        return self.frame
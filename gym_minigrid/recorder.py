@@ -0,0 +1,157 @@
+import queue
+import threading
+import numpy as np
+from .minigrid import CELL_PIXELS
+from .raster import render_batch
+
+class Y4MWriter:
+    """
+    Write RGB frames to an uncompressed YUV4MPEG2 (.y4m) video file,
+    without chroma subsampling. The size of the video is that of the
+    first frame.
+    """
+
+    def __init__(self, path, fps=10):
+        self.path = path
+        self.fps = fps
+        self.file = open(path, 'wb')
+        self.shape = None
+        self.num_frames = 0
+
+    def write(self, frame):
+        if self.shape is None:
+            self.shape = frame.shape
+            height, width, _ = frame.shape
+            header = 'YUV4MPEG2 W%d H%d F%d:1 Ip A1:1 C444\n' % (width, height, self.fps)
+            self.file.write(header.encode())
+        assert frame.shape == self.shape, "frames must all have the same size"
+
+        # BT.601 studio range, in fixed point
+        rgb = frame.astype(np.int32)
+        r, g, b = rgb[:, :, 0], rgb[:, :, 1], rgb[:, :, 2]
+        y = (( 66 * r + 129 * g +  25 * b + 128) >> 8) + 16
+        u = ((-38 * r -  74 * g + 112 * b + 128) >> 8) + 128
+        v = ((112 * r -  94 * g -  18 * b + 128) >> 8) + 128
+
+        self.file.write(b'FRAME\n')
+        self.file.write(np.stack([y, u, v]).astype(np.uint8).tobytes())
+        self.num_frames += 1
+
+    def close(self):
+        self.file.close()
+
+class NpzWriter:
+    """
+    Write the arrays of successive steps, given as dictionaries of
+    arrays, to a series of .npz files holding chunk_size steps each,
+    named path_00000.npz, path_00001.npz and so on. Only one chunk is
+    held in memory at a time.
+    """
+
+    def __init__(self, path, chunk_size=256):
+        assert chunk_size > 0
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunk = []
+        self.num_chunks = 0
+
+    def write(self, arrays):
+        self.chunk.append(arrays)
+        if len(self.chunk) == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.chunk) == 0:
+            return
+
+        np.savez(
+            '%s_%05d.npz' % (self.path, self.num_chunks),
+            **{k: np.stack([step[k] for step in self.chunk]) for k in self.chunk[0]}
+        )
+        self.chunk = []
+        self.num_chunks += 1
+
+    def close(self):
+        self.flush()
+
+class BackgroundWriter:
+    """
+    Thread which writes data to writers (Y4MWriter, NpzWriter) in the
+    background. Data waits in a bounded queue, so that the thread
+    producing it blocks rather than holding more than queue_size items
+    in memory when writing falls behind. Errors raised while writing are
+    raised again by the next call to write or close.
+    """
+
+    def __init__(self, queue_size=16):
+        assert queue_size > 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            # Once an error occurred, drain the queue without writing
+            writer, data = item
+            if self.error is not None:
+                continue
+
+            try:
+                if data is None:
+                    writer.close()
+                else:
+                    writer.write(data)
+            except Exception as e:
+                self.error = e
+
+    def _check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def write(self, writer, data):
+        """
+        Queue data to write with a writer
+        """
+
+        self._check()
+        self.queue.put((writer, data))
+
+    def close_writer(self, writer):
+        """
+        Queue the closing of a writer, after the data already queued
+        """
+
+        self.write(writer, None)
+
+    def close(self):
+        """
+        Write all queued data and stop the thread
+        """
+
+        self.queue.put(None)
+        self.thread.join()
+        self._check()
+
+def load_chunk(path, tile_size=CELL_PIXELS):
+    """
+    Load the frames of an .npz chunk written by RecorderWrapper, as an
+    (N, height, width, 3) array. Chunks of encoded grids are rendered.
+    """
+
+    data = np.load(path)
+    if 'frames' in data:
+        return data['frames']
+
+    return render_batch(
+        data['grids'],
+        tile_size,
+        agent_pos=data['agent_pos'],
+        agent_dir=data['agent_dir'],
+        highlight=data['highlight']
+    )
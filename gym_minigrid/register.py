@@ -19,3 +19,95 @@ def register(
 
     # Add the environment to the set
     env_list.append(id)
+
+# Environments of the package, as (id, module in gym_minigrid.envs, class)
+# They are registered from this table, so that the module defining an
+# environment is only imported when the environment is made
+ENV_TABLE = [
+    ('MiniGrid-Empty-5x5-v0', 'empty', 'EmptyEnv5x5'),
+    ('MiniGrid-Empty-Random-5x5-v0', 'empty', 'EmptyRandomEnv5x5'),
+    ('MiniGrid-Empty-6x6-v0', 'empty', 'EmptyEnv6x6'),
+    ('MiniGrid-Empty-Random-6x6-v0', 'empty', 'EmptyRandomEnv6x6'),
+    ('MiniGrid-Empty-8x8-v0', 'empty', 'EmptyEnv'),
+    ('MiniGrid-Empty-16x16-v0', 'empty', 'EmptyEnv16x16'),
+
+    ('MiniGrid-DoorKey-5x5-v0', 'doorkey', 'DoorKeyEnv5x5'),
+    ('MiniGrid-DoorKey-6x6-v0', 'doorkey', 'DoorKeyEnv6x6'),
+    ('MiniGrid-DoorKey-8x8-v0', 'doorkey', 'DoorKeyEnv'),
+    ('MiniGrid-DoorKey-16x16-v0', 'doorkey', 'DoorKeyEnv16x16'),
+
+    ('MiniGrid-MultiRoom-N2-S4-v0', 'multiroom', 'MultiRoomEnvN2S4'),
+    ('MiniGrid-MultiRoom-N4-S5-v0', 'multiroom', 'MultiRoomEnvN4S5'),
+    ('MiniGrid-MultiRoom-N6-v0', 'multiroom', 'MultiRoomEnvN6'),
+
+    ('MiniGrid-Fetch-5x5-N2-v0', 'fetch', 'FetchEnv5x5N2'),
+    ('MiniGrid-Fetch-5x5-N3-v0', 'fetch', 'FetchEnv5x5N3'),
+    ('MiniGrid-Fetch-6x6-N2-v0', 'fetch', 'FetchEnv6x6N2'),
+    ('MiniGrid-FixedFetch-5x5-N3-1st-v0', 'fetch', 'FetchEnvFixed5x5N3_1st'),
+    ('MiniGrid-FixedFetch-5x5-N3-2nd-v0', 'fetch', 'FetchEnvFixed5x5N3_2nd'),
+    ('MiniGrid-Fetch-8x8-N3-v0', 'fetch', 'FetchEnv'),
+
+    ('MiniGrid-GoToObject-6x6-N2-v0', 'gotoobject', 'GoToObjectEnv'),
+    ('MiniGrid-GoToObject-8x8-N2-v0', 'gotoobject', 'GotoEnv8x8N2'),
+
+    ('MiniGrid-GoToDoor-5x5-v0', 'gotodoor', 'GoToDoorEnv'),
+    ('MiniGrid-GoToDoor-6x6-v0', 'gotodoor', 'GoToDoor6x6Env'),
+    ('MiniGrid-GoToDoor-8x8-v0', 'gotodoor', 'GoToDoor8x8Env'),
+
+    ('MiniGrid-PutNear-6x6-N2-v0', 'putnear', 'PutNearEnv'),
+    ('MiniGrid-PutNear-8x8-N3-v0', 'putnear', 'PutNear8x8N3'),
+
+    ('MiniGrid-LockedRoom-v0', 'lockedroom', 'LockedRoom'),
+
+    ('MiniGrid-KeyCorridorS3R1-v0', 'keycorridor', 'KeyCorridorS3R1'),
+    ('MiniGrid-KeyCorridorS3R2-v0', 'keycorridor', 'KeyCorridorS3R2'),
+    ('MiniGrid-KeyCorridorS3R3-v0', 'keycorridor', 'KeyCorridorS3R3'),
+    ('MiniGrid-KeyCorridorS4R3-v0', 'keycorridor', 'KeyCorridorS4R3'),
+    ('MiniGrid-KeyCorridorS5R3-v0', 'keycorridor', 'KeyCorridorS5R3'),
+    ('MiniGrid-KeyCorridorS6R3-v0', 'keycorridor', 'KeyCorridorS6R3'),
+
+    ('MiniGrid-Unlock-v0', 'unlock', 'Unlock'),
+
+    ('MiniGrid-UnlockPickup-v0', 'unlockpickup', 'UnlockPickup'),
+
+    ('MiniGrid-BlockedUnlockPickup-v0', 'blockedunlockpickup', 'BlockedUnlockPickup'),
+
+    ('MiniGrid-Playground-v0', 'playground_v0', 'PlaygroundV0'),
+
+    ('MiniGrid-RedBlueDoors-6x6-v0', 'redbluedoors', 'RedBlueDoorEnv6x6'),
+    ('MiniGrid-RedBlueDoors-8x8-v0', 'redbluedoors', 'RedBlueDoorEnv'),
+
+    ('MiniGrid-ObstructedMaze-1Dl-v0', 'obstructedmaze', 'ObstructedMaze_1Dl'),
+    ('MiniGrid-ObstructedMaze-1Dlh-v0', 'obstructedmaze', 'ObstructedMaze_1Dlh'),
+    ('MiniGrid-ObstructedMaze-1Dlhb-v0', 'obstructedmaze', 'ObstructedMaze_1Dlhb'),
+    ('MiniGrid-ObstructedMaze-2Dl-v0', 'obstructedmaze', 'ObstructedMaze_2Dl'),
+    ('MiniGrid-ObstructedMaze-2Dlh-v0', 'obstructedmaze', 'ObstructedMaze_2Dlh'),
+    ('MiniGrid-ObstructedMaze-2Dlhb-v0', 'obstructedmaze', 'ObstructedMaze_2Dlhb'),
+    ('MiniGrid-ObstructedMaze-1Q-v0', 'obstructedmaze', 'ObstructedMaze_1Q'),
+    ('MiniGrid-ObstructedMaze-2Q-v0', 'obstructedmaze', 'ObstructedMaze_2Q'),
+    ('MiniGrid-ObstructedMaze-Full-v0', 'obstructedmaze', 'ObstructedMaze_Full'),
+
+    ('MiniGrid-MemoryS17Random-v0', 'memory', 'MemoryS17Random'),
+    ('MiniGrid-MemoryS13Random-v0', 'memory', 'MemoryS13Random'),
+    ('MiniGrid-MemoryS13-v0', 'memory', 'MemoryS13'),
+    ('MiniGrid-MemoryS11-v0', 'memory', 'MemoryS11'),
+    ('MiniGrid-MemoryS9-v0', 'memory', 'MemoryS9'),
+    ('MiniGrid-MemoryS7-v0', 'memory', 'MemoryS7'),
+
+    ('MiniGrid-FourRooms-v0', 'fourrooms', 'FourRoomsEnv'),
+
+    ('MiniGrid-LavaCrossingS9N1-v0', 'crossing', 'LavaCrossingEnv'),
+    ('MiniGrid-LavaCrossingS9N2-v0', 'crossing', 'LavaCrossingS9N2Env'),
+    ('MiniGrid-LavaCrossingS9N3-v0', 'crossing', 'LavaCrossingS9N3Env'),
+    ('MiniGrid-LavaCrossingS11N5-v0', 'crossing', 'LavaCrossingS11N5Env'),
+    ('MiniGrid-SimpleCrossingS9N1-v0', 'crossing', 'SimpleCrossingEnv'),
+    ('MiniGrid-SimpleCrossingS9N2-v0', 'crossing', 'SimpleCrossingS9N2Env'),
+    ('MiniGrid-SimpleCrossingS9N3-v0', 'crossing', 'SimpleCrossingS9N3Env'),
+    ('MiniGrid-SimpleCrossingS11N5-v0', 'crossing', 'SimpleCrossingS11N5Env'),
+]
+
+for env_id, module, class_name in ENV_TABLE:
+    register(
+        id=env_id,
+        entry_point='gym_minigrid.envs.%s:%s' % (module, class_name)
+    )
@@ -100,9 +100,24 @@ class Renderer:
         self.width = width
         self.height = height
 
-        self.img = QImage(width, height, QImage.Format_RGB888)
+        # Pixels of the image, held by a numpy array which the image draws
+        # into. QImage rows are padded to a multiple of 4 bytes, which the
+        # (height, width, 3) view self.array skips.
+        bytesPerLine = (width * 3 + 3) // 4 * 4
+        self.buffer = np.zeros((height, bytesPerLine), dtype='uint8')
+        self.array = self.buffer[:, :width * 3].reshape((height, width, 3))
+        self.img = QImage(
+            self.buffer.ctypes.data,
+            width,
+            height,
+            bytesPerLine,
+            QImage.Format_RGB888
+        )
         self.painter = QPainter()
 
+        # Pixmap shown in the window, updated in place
+        self.pixmap = None
+
         self.window = None
         if ownWindow:
             self.app = QApplication([])
@@ -124,29 +139,51 @@ class Renderer:
 
     def endFrame(self):
         self.painter.end()
+        self.updateWindow()
+
+    def updateWindow(self):
+        """
+        Show the image in the window, if there is one
+        """
 
+        # Pixmaps are only needed to show the image in a window
         if self.window:
             if self.window.closed:
                 self.window = None
+                self.pixmap = None
             else:
-                self.window.setPixmap(self.getPixmap())
+                if self.pixmap is None:
+                    self.pixmap = QPixmap.fromImage(self.img)
+                else:
+                    self.pixmap.convertFromImage(self.img)
+                self.window.setPixmap(self.pixmap)
                 self.app.processEvents()
 
+    def setArray(self, array):
+        """
+        Replace the image by a (height, width, 3) array of RGB pixel
+        values, and show it in the window if there is one
+        """
+
+        self.array[:] = array
+        self.updateWindow()
+
     def getPixmap(self):
         return QPixmap.fromImage(self.img)
 
-    def getArray(self):
+    def getArray(self, out=None):
         """
         Get a numpy array of RGB pixel values.
         The array will have shape (height, width, 3)
+        Without out, the array views the image, and so is overwritten by
+        the next frame. Otherwise the pixels are copied into out.
         """
 
-        numBytes = self.width * self.height * 3
-        buf = self.img.bits().asstring(numBytes)
-        output = np.frombuffer(buf, dtype='uint8')
-        output = output.reshape((self.height, self.width, 3))
+        if out is None:
+            return self.array
 
-        return output
+        out[:] = self.array
+        return out
 
     def push(self):
         self.painter.save()
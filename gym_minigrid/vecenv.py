@@ -0,0 +1,482 @@
+import ctypes
+import multiprocessing as mp
+import numpy as np
+from .minigrid import *
+from .minigrid import _obj_table, _vis_row, _vis_table, _view_map
+from .envs.empty import EmptyEnv
+from .envs.doorkey import DoorKeyEnv
+from .envs.fourrooms import FourRoomsEnv
+from .envs.crossing import CrossingEnv
+
+# Environments whose dynamics are those of MiniGridEnv.step
+SUPPORTED_ENVS = (EmptyEnv, DoorKeyEnv, FourRoomsEnv, CrossingEnv)
+SUPPORTED_STEPS = (MiniGridEnv.step, FourRoomsEnv.step)
+
+# Object properties, indexed by type and state code
+CAN_OVERLAP = _obj_table(lambda v: v.can_overlap(), False)
+CAN_OVERLAP[OBJECT_TO_IDX['empty']] = True
+CAN_PICKUP = _obj_table(lambda v: v.can_pickup(), False)
+
+class VecMiniGrid:
+    """
+    Batch of MiniGrid environments stepped together with NumPy.
+
+    Levels are generated by the environments passed in, with their own
+    random number generators, after which the N grids are held as one
+    (N, width, height, 3) array of encoded cells and all agents act at
+    once. Episodes which end are reset automatically, and the first
+    observation of the new episode is returned in their slot.
+
+    Only the dynamics of MiniGridEnv.step are supported. Objects are
+    tracked through their encoding alone, so boxes lose their contents.
+    """
+
+    def __init__(self, envs):
+        assert len(envs) > 0
+        self.envs = [env.unwrapped for env in envs]
+
+        env = self.envs[0]
+        for e in self.envs:
+            assert isinstance(e, SUPPORTED_ENVS), type(e)
+            assert type(e).step in SUPPORTED_STEPS, "custom step not supported"
+            assert (e.width, e.height) == (env.width, env.height)
+            assert e.agent_view_size == env.agent_view_size
+
+        self.num_envs = len(self.envs)
+        self.width = env.width
+        self.height = env.height
+        self.agent_view_size = env.agent_view_size
+
+        self.actions = MiniGridEnv.Actions
+        self.action_space = env.action_space
+        self.observation_space = env.observation_space
+        self.reward_range = env.reward_range
+
+        # Grid planes of all environments, surrounded by walls so that the
+        # agent views never fall outside of the array
+        n = self.num_envs
+        pad = self.agent_view_size - 1
+        self.pad = pad
+        self.padded = np.empty(
+            (n, self.width + 2 * pad, self.height + 2 * pad, 3),
+            dtype='uint8'
+        )
+        self.padded[:] = Grid.WALL
+        self.grids = self.padded[:, pad:pad+self.width, pad:pad+self.height]
+
+        self.agent_pos = np.zeros((n, 2), dtype=np.int64)
+        self.agent_dir = np.zeros(n, dtype=np.int64)
+        self.carrying = np.zeros((n, 3), dtype='uint8')
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self.max_steps = np.array([e.max_steps for e in self.envs])
+        self.see_through_walls = np.array(
+            [e.see_through_walls for e in self.envs])
+        self.missions = [None] * n
+
+        # Agent view index maps for each direction
+        maps = [_view_map(d, self.agent_view_size) for d in range(4)]
+        self.view_x = np.stack([m[0] for m in maps])
+        self.view_y = np.stack([m[1] for m in maps])
+
+        self.dir_vecs = np.array(DIR_TO_VEC)
+
+        # Padded grid coordinates of the agent views, and which of their
+        # cells are visible, as of the last observation
+        self.seen_cells = None
+
+    def seed(self, seeds):
+        """
+        Seed each environment, with one seed per environment
+        """
+
+        assert len(seeds) == self.num_envs
+        for env, seed in zip(self.envs, seeds):
+            env.seed(seed)
+        return list(seeds)
+
+    def _load(self, k):
+        """
+        Generate a new level for environment k and copy it into the batch
+        """
+
+        env = self.envs[k]
+        env.reset()
+
+        self.grids[k] = env.grid.array
+        self.agent_pos[k] = env.agent_pos
+        self.agent_dir[k] = env.agent_dir
+        self.carrying[k] = Grid.EMPTY
+        self.step_count[k] = 0
+        self.max_steps[k] = env.max_steps
+        self.missions[k] = env.mission
+
+    def reset(self):
+        for k in range(self.num_envs):
+            self._load(k)
+
+        return self.gen_obs()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,)
+        assert np.all((actions >= 0) & (actions < len(self.actions))), \
+            "unknown action"
+
+        n = self.num_envs
+        idx = np.arange(n)
+        pad = self.pad
+
+        self.step_count += 1
+
+        reward = np.zeros(n)
+        done = np.zeros(n, dtype=bool)
+
+        # Get the contents of the cell in front of each agent
+        fwd_pos = self.agent_pos + self.dir_vecs[self.agent_dir]
+        fx = fwd_pos[:, 0] + pad
+        fy = fwd_pos[:, 1] + pad
+        fwd_cell = self.padded[idx, fx, fy]
+        fwd_type = fwd_cell[:, 0]
+        fwd_state = fwd_cell[:, 2]
+        empty_hands = self.carrying[:, 0] == OBJECT_TO_IDX['empty']
+
+        # Rotate left
+        left = actions == self.actions.left
+        self.agent_dir[left] = (self.agent_dir[left] - 1) % 4
+
+        # Rotate right
+        right = actions == self.actions.right
+        self.agent_dir[right] = (self.agent_dir[right] + 1) % 4
+
+        # Move forward
+        fwd = actions == self.actions.forward
+        move = fwd & CAN_OVERLAP[fwd_type, fwd_state]
+        self.agent_pos[move] = fwd_pos[move]
+        goal = fwd & (fwd_type == OBJECT_TO_IDX['goal'])
+        done |= goal
+        reward[goal] = 1 - 0.9 * (self.step_count[goal] / self.max_steps[goal])
+        done |= fwd & (fwd_type == OBJECT_TO_IDX['lava'])
+
+        # Pick up an object
+        pickup = (actions == self.actions.pickup) & \
+            CAN_PICKUP[fwd_type, fwd_state] & empty_hands
+        self.carrying[pickup] = fwd_cell[pickup]
+        self.padded[idx[pickup], fx[pickup], fy[pickup]] = Grid.EMPTY
+
+        # Drop an object
+        drop = (actions == self.actions.drop) & \
+            (fwd_type == OBJECT_TO_IDX['empty']) & ~empty_hands
+        self.padded[idx[drop], fx[drop], fy[drop]] = self.carrying[drop]
+        self.carrying[drop] = Grid.EMPTY
+
+        # Toggle/activate an object
+        toggle = actions == self.actions.toggle
+        door = toggle & (fwd_type == OBJECT_TO_IDX['door'])
+        # State, 0: open, 1: closed, 2: locked
+        has_key = (self.carrying[:, 0] == OBJECT_TO_IDX['key']) & \
+            (self.carrying[:, 1] == fwd_cell[:, 1])
+        unlock = door & (fwd_state == 2) & has_key
+        flip = door & (fwd_state != 2)
+        new_state = np.where(unlock, 0, 1 - fwd_state)
+        self.padded[idx[unlock | flip], fx[unlock | flip], fy[unlock | flip], 2] = \
+            new_state[unlock | flip]
+        box = toggle & (fwd_type == OBJECT_TO_IDX['box'])
+        self.padded[idx[box], fx[box], fy[box]] = Grid.EMPTY
+
+        done |= self.step_count >= self.max_steps
+
+        # Start new episodes where the current ones ended
+        for k in np.nonzero(done)[0]:
+            self._load(k)
+
+        obs = self.gen_obs()
+
+        return obs, reward, done, [{} for _ in range(n)]
+
+    def gen_obs(self):
+        """
+        Generate the agent views of all environments, as MiniGridEnv.gen_obs
+        """
+
+        n = self.num_envs
+        size = self.agent_view_size
+        pad = self.pad
+
+        # Gather the agent views from the padded grids
+        xs = self.view_x[self.agent_dir] + (self.agent_pos[:, 0] + pad)[:, None, None]
+        ys = self.view_y[self.agent_dir] + (self.agent_pos[:, 1] + pad)[:, None, None]
+        image = self.padded[np.arange(n)[:, None, None], xs, ys]
+
+        # Process occluders and visibility, one row at a time,
+        # as in Grid.process_vis
+        col_bits = 1 << np.arange(size, dtype=np.int64)
+        transparent = SEE_BEHIND[image[..., 0], image[..., 2]]
+        rows = (transparent * col_bits[None, :, None]).sum(axis=1)
+
+        table = _vis_table(size)
+        full = (1 << size) - 1
+        vis_rows = np.zeros((n, size), dtype=np.int64)
+        seen = np.zeros(n, dtype=np.int64)
+        seen |= 1 << (size // 2)
+
+        for j in reversed(range(0, size)):
+            if table is not None:
+                vis = table[rows[:, j], seen].astype(np.int64)
+            else:
+                vis = _vis_row(rows[:, j], seen, size)
+            vis_rows[:, j] = vis
+
+            spread = vis & rows[:, j]
+            seen = (spread | (spread << 1) | (spread >> 1)) & full
+
+        vis_mask = (vis_rows[:, None, :] & col_bits[None, :, None]) != 0
+        vis_mask[self.see_through_walls] = True
+
+        # Keep the padded grid cells seen, to highlight them in render
+        self.seen_cells = (xs, ys, vis_mask)
+
+        # Make it so the agent sees what it's carrying
+        image[:, size // 2, size - 1] = self.carrying
+
+        image[~vis_mask] = 0
+
+        return {
+            'image': image,
+            'direction': self.agent_dir.copy(),
+            'mission': list(self.missions)
+        }
+
+    def render(self, mode='rgb_array', tile_size=CELL_PIXELS, out=None):
+        """
+        Render the whole grids of all environments into one
+        (N, height, width, 3) RGB array, as MiniGridEnv.render does
+        """
+
+        assert mode == 'rgb_array', "only rgb_array rendering is supported"
+        from .raster import render_batch
+
+        # Cells visible to the agents, in grid coordinates
+        highlight = None
+        if self.seen_cells is not None:
+            xs, ys, vis_mask = self.seen_cells
+            n, pad = self.num_envs, self.pad
+            seen = np.zeros(self.padded.shape[:3], dtype=bool)
+            seen[np.arange(n)[:, None, None], xs, ys] = vis_mask
+            highlight = seen[:, pad:pad+self.width, pad:pad+self.height]
+
+        return render_batch(
+            self.grids,
+            tile_size,
+            agent_pos=self.agent_pos,
+            agent_dir=self.agent_dir,
+            highlight=highlight,
+            out=out
+        )
+
+def _subproc_worker(remote, parent_remote, env_fns, buf, shape, start):
+    """
+    Run a contiguous slice of environments, writing the images of their
+    observations into the shared buffer
+    """
+
+    parent_remote.close()
+
+    envs = [fn() for fn in env_fns]
+    images = np.frombuffer(buf, dtype='uint8').reshape(shape)
+    slots = [images[start + k] for k in range(len(envs))]
+    mission_ids = {}
+
+    # Have unwrapped environments write their images into shared memory
+    for env, slot in zip(envs, slots):
+        if env is env.unwrapped:
+            env.set_obs_buffer(slot)
+
+    def write_obs(k, obs, out):
+        if obs['image'] is not slots[k]:
+            slots[k][:] = obs['image']
+        out['direction'][k] = obs['direction']
+
+        # Missions are sent once, then referred to by id
+        mission = obs['mission']
+        if mission not in mission_ids:
+            mission_ids[mission] = len(mission_ids)
+            out['new_missions'].append(mission)
+        out['mission'][k] = mission_ids[mission]
+
+    def new_out():
+        return {
+            'direction': np.zeros(len(envs), dtype=np.int64),
+            'mission': np.zeros(len(envs), dtype=np.int64),
+            'new_missions': []
+        }
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+
+            if cmd == 'step':
+                out = new_out()
+                out['reward'] = np.zeros(len(envs))
+                out['done'] = np.zeros(len(envs), dtype=bool)
+                out['info'] = {}
+                for k, env in enumerate(envs):
+                    obs, reward, done, info = env.step(data[k])
+                    if done:
+                        obs = env.reset()
+                    out['reward'][k] = reward
+                    out['done'][k] = done
+                    if info:
+                        out['info'][k] = info
+                    write_obs(k, obs, out)
+                remote.send(out)
+
+            elif cmd == 'reset':
+                out = new_out()
+                for k, env in enumerate(envs):
+                    write_obs(k, env.reset(), out)
+                remote.send(out)
+
+            elif cmd == 'seed':
+                for env, seed in zip(envs, data):
+                    env.seed(seed)
+                remote.send(None)
+
+            elif cmd == 'close':
+                for env in envs:
+                    env.close()
+                break
+
+            else:
+                assert False, "unknown command '%s'" % cmd
+    finally:
+        remote.close()
+
+class SubprocVecMiniGrid:
+    """
+    Batch of MiniGrid environments stepped in worker processes.
+
+    Each worker runs a contiguous slice of the environments. Workers
+    write the observed images straight into a shared memory buffer, and
+    only send back rewards, done flags, directions and mission ids over
+    their pipe. The image array returned by reset and step is that shared
+    buffer: it is overwritten by the next step, copy it to keep it.
+
+    Environments are created in the workers by calling env_fns, which
+    must be picklable when processes are not started by forking.
+    """
+
+    def __init__(self, env_fns, num_workers=None, start_method=None):
+        assert len(env_fns) > 0
+
+        self.num_envs = len(env_fns)
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        num_workers = max(1, min(num_workers, self.num_envs))
+
+        # Get the observation format from a local instance
+        env = env_fns[0]()
+        self.actions = env.unwrapped.actions
+        self.action_space = env.action_space
+        self.observation_space = env.observation_space
+        self.reward_range = env.reward_range
+        image_shape = env.observation_space.spaces['image'].shape
+        env.close()
+
+        ctx = mp.get_context(start_method)
+
+        shape = (self.num_envs,) + tuple(image_shape)
+        buf = ctx.RawArray(ctypes.c_uint8, int(np.prod(shape)))
+        self.images = np.frombuffer(buf, dtype='uint8').reshape(shape)
+
+        # Split the environments into contiguous slices
+        bounds = np.linspace(0, self.num_envs, num_workers + 1).astype(int)
+        self.slices = list(zip(bounds[:-1], bounds[1:]))
+
+        self.remotes = []
+        self.processes = []
+        for start, end in self.slices:
+            remote, work_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_subproc_worker,
+                args=(work_remote, remote, env_fns[start:end], buf, shape, start),
+                daemon=True
+            )
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        # Mission strings received from each worker, indexed by id
+        self.missions = [[] for _ in self.slices]
+
+        self.closed = False
+
+    def _gather(self, outs):
+        directions = np.zeros(self.num_envs, dtype=np.int64)
+        missions = []
+
+        for w, ((start, end), out) in enumerate(zip(self.slices, outs)):
+            self.missions[w].extend(out['new_missions'])
+            directions[start:end] = out['direction']
+            missions.extend(self.missions[w][i] for i in out['mission'])
+
+        return {
+            'image': self.images,
+            'direction': directions,
+            'mission': missions
+        }
+
+    def seed(self, seeds):
+        """
+        Seed each environment, with one seed per environment
+        """
+
+        assert len(seeds) == self.num_envs
+        for remote, (start, end) in zip(self.remotes, self.slices):
+            remote.send(('seed', list(seeds[start:end])))
+        for remote in self.remotes:
+            remote.recv()
+        return list(seeds)
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(('reset', None))
+
+        return self._gather([remote.recv() for remote in self.remotes])
+
+    def step_async(self, actions):
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,)
+
+        for remote, (start, end) in zip(self.remotes, self.slices):
+            remote.send(('step', actions[start:end]))
+
+    def step_wait(self):
+        outs = [remote.recv() for remote in self.remotes]
+
+        obs = self._gather(outs)
+        reward = np.concatenate([out['reward'] for out in outs])
+        done = np.concatenate([out['done'] for out in outs])
+
+        infos = []
+        for (start, end), out in zip(self.slices, outs):
+            infos.extend(out['info'].get(k, {}) for k in range(end - start))
+
+        return obs, reward, done, infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        for remote in self.remotes:
+            remote.close()
+
+        self.closed = True
@@ -1,3 +1,4 @@
+import os
 import math
 import operator
 from functools import reduce
@@ -5,7 +6,7 @@ from functools import reduce
 import numpy as np
 import gym
 from gym import error, spaces, utils
-from .minigrid import OBJECT_TO_IDX, COLOR_TO_IDX
+from .minigrid import OBJECT_TO_IDX, COLOR_TO_IDX, CELL_PIXELS
 
 class ReseedWrapper(gym.core.Wrapper):
     """
@@ -29,6 +30,171 @@ class ReseedWrapper(gym.core.Wrapper):
         obs, reward, done, info = self.env.step(action)
         return obs, reward, done, info
 
+class LevelBankWrapper(gym.core.Wrapper):
+    """
+    Wrapper to load levels from a LevelBank on reset instead of generating
+    them, when the environment was seeded with a seed held by the bank.
+    Levels which don't match the state of the environment (see
+    LevelBank.matches) are generated, so the levels are always those of
+    the environment alone. Combine with ReseedWrapper cycling through the
+    seeds of a bank in bank order to load most of its levels.
+    """
+
+    def __init__(self, env, bank):
+        assert env is env.unwrapped, "wrap the environment itself"
+        super().__init__(env)
+        self.bank = bank
+        self.next_seed = None
+
+    def seed(self, seed=None):
+        self.next_seed = seed
+
+        # Loading a level restores the random number generator
+        if seed in self.bank:
+            return [seed]
+
+        return self.env.seed(seed)
+
+    def reset(self, **kwargs):
+        seed = self.next_seed
+        self.next_seed = None
+
+        if seed not in self.bank:
+            return self.env.reset(**kwargs)
+
+        idx = self.bank.index(seed)
+        if not self.bank.matches(self.env, idx):
+            self.env.seed(seed)
+            return self.env.reset(**kwargs)
+
+        self.bank.load(self.env, idx)
+        return self.env.gen_obs()
+
+class PrefetchWrapper(gym.core.Wrapper):
+    """
+    Wrapper to generate upcoming levels in the background, so that reset
+    only loads a ready level. See LevelPrefetcher for the arguments.
+    """
+
+    def __init__(self, env, seeds=None, num_workers=1, queue_size=8, processes=False):
+        assert env is env.unwrapped, "wrap the environment itself"
+        super().__init__(env)
+
+        from .prefetch import LevelPrefetcher
+        self.prefetcher = LevelPrefetcher(
+            env,
+            seeds=seeds,
+            num_workers=num_workers,
+            queue_size=queue_size,
+            processes=processes
+        )
+
+    def reset(self, **kwargs):
+        self.env.set_state(self.prefetcher.next_state())
+        return self.env.gen_obs()
+
+    def close(self):
+        self.prefetcher.close()
+        return self.env.close()
+
+class RecorderWrapper(gym.core.Wrapper):
+    """
+    Wrapper to record episodes to disk as they are played, one file per
+    episode, named episode_000000 and so on in directory.
+
+    Frames are rendered with the numpy backend and written by a
+    background thread through a bounded queue (see BackgroundWriter),
+    so memory use doesn't grow with the length of episodes. With the
+    'y4m' format, each episode is an uncompressed .y4m video. With the
+    'npz' format, episodes are split in .npz chunks of chunk_size steps.
+    With encoded, only the grid encoding, agent position and direction
+    and visible cells of each step are stored, in .npz chunks, to be
+    rendered later with recorder.load_chunk.
+    """
+
+    def __init__(
+        self,
+        env,
+        directory,
+        format='y4m',
+        encoded=False,
+        tile_size=CELL_PIXELS,
+        chunk_size=256,
+        queue_size=16
+    ):
+        assert format in ['y4m', 'npz']
+        assert not encoded or format == 'npz', "encoded steps are stored as npz"
+        self.__dict__.update(vars(env))  # Pass values to super wrapper
+        super().__init__(env)
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.format = format
+        self.encoded = encoded
+        self.tile_size = tile_size
+        self.chunk_size = chunk_size
+
+        from .recorder import BackgroundWriter
+        self.writer = BackgroundWriter(queue_size)
+        self.episode_writer = None
+        self.episode_id = 0
+
+    def _record(self):
+        env = self.unwrapped
+        vis_mask = env.gen_vis_mask()
+
+        if self.encoded:
+            data = {
+                'grids': env.grid.array.copy(),
+                'agent_pos': np.array(env.agent_pos),
+                'agent_dir': np.array(env.agent_dir),
+                'highlight': vis_mask
+            }
+        else:
+            from .raster import render_grid
+            data = render_grid(
+                env.grid,
+                self.tile_size,
+                agent_pos=env.agent_pos,
+                agent_dir=env.agent_dir,
+                highlight=vis_mask
+            )
+            if self.format == 'npz':
+                data = {'frames': data}
+
+        self.writer.write(self.episode_writer, data)
+
+    def _end_episode(self):
+        if self.episode_writer is not None:
+            self.writer.close_writer(self.episode_writer)
+            self.episode_writer = None
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+
+        self._end_episode()
+        from .recorder import Y4MWriter, NpzWriter
+        path = os.path.join(self.directory, 'episode_%06d' % self.episode_id)
+        if self.format == 'y4m':
+            fps = self.metadata.get('video.frames_per_second', 10)
+            self.episode_writer = Y4MWriter(path + '.y4m', fps)
+        else:
+            self.episode_writer = NpzWriter(path, self.chunk_size)
+        self.episode_id += 1
+
+        self._record()
+        return obs
+
+    def step(self, action):
+        obs, reward, done, info = self.env.step(action)
+        self._record()
+        return obs, reward, done, info
+
+    def close(self):
+        self._end_episode()
+        self.writer.close()
+        return self.env.close()
+
 class ActionBonus(gym.core.Wrapper):
     """
     Wrapper which adds an exploration bonus.
@@ -114,6 +280,33 @@ class ImgObsWrapper(gym.core.ObservationWrapper):
     def observation(self, obs):
         return obs['image']
 
+class RGBImgPartialObsWrapper(gym.core.ObservationWrapper):
+    """
+    Replace the encoded partial view by an RGB image of it, rendered by
+    tile lookup, with tile_size pixels per cell
+    """
+
+    def __init__(self, env, tile_size=8):
+        self.__dict__.update(vars(env))  # Pass values to super wrapper
+        super().__init__(env)
+
+        self.tile_size = tile_size
+
+        width, height, _ = env.observation_space.spaces['image'].shape
+        self.observation_space = spaces.Dict(dict(
+            env.observation_space.spaces,
+            image=spaces.Box(
+                low=0,
+                high=255,
+                shape=(height * tile_size, width * tile_size, 3),
+                dtype='uint8'
+            )
+        ))
+
+    def observation(self, obs):
+        from .raster import render_obs
+        return dict(obs, image=render_obs(obs['image'], self.tile_size))
+
 class FullyObsWrapper(gym.core.ObservationWrapper):
     """
     Fully observable gridworld using a compact grid encoding
@@ -130,6 +323,9 @@ class FullyObsWrapper(gym.core.ObservationWrapper):
             dtype='uint8'
         )
 
+        # The partial view is never read, don't generate it
+        self.unwrapped.set_obs_mode('lazy')
+
     def observation(self, obs):
         env = self.unwrapped
         full_grid = env.grid.encode()
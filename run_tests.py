@@ -4,7 +4,7 @@ import random
 import numpy as np
 import gym
 from gym_minigrid.register import env_list
-from gym_minigrid.minigrid import Grid, OBJECT_TO_IDX
+from gym_minigrid.minigrid import Grid, OBJECT_TO_IDX, COLOR_NAMES
 
 # Test specifically importing a specific environment
 from gym_minigrid.envs import DoorKeyEnv
@@ -53,6 +53,8 @@ for env_name in env_list:
         vis_mask = img[:, :, 0] != OBJECT_TO_IDX['unseen']  # hackish
         img2 = Grid.decode(img).encode(vis_mask=vis_mask)
         assert np.array_equal(img, img2)
+        img3 = Grid.decode(img, lazy=True).encode(vis_mask=vis_mask)
+        assert np.array_equal(img, img3)
 
         # Test the env to string function
         str(env)
@@ -83,6 +85,14 @@ for env_name in env_list:
     env.step(0)
     env.close()
 
+    # Test the RGB partial view wrapper
+    env = gym.make(env_name)
+    env = RGBImgPartialObsWrapper(env)
+    env.reset()
+    obs, _, _, _ = env.step(0)
+    assert obs['image'].shape == env.observation_space.spaces['image'].shape
+    env.close()
+
     # Test the fully observable wrapper
     env = gym.make(env_name)
     env = FullyObsWrapper(env)
@@ -124,4 +134,661 @@ for i in range(0, 500):
     if done:
         env.reset()
 
+##############################################################################
+
+print('testing Grid')
+import copy
+from gym_minigrid.minigrid import PLAIN_OBJS, Wall, Floor, Goal, Lava
+from gym_minigrid.minigrid import Door, Key, Ball, Box
+
+# Reference implementations, working cell by cell on lists of objects
+
+def grid_cells(grid):
+    return [[grid.get(i, j) for j in range(grid.height)] for i in range(grid.width)]
+
+def ref_slice(cells, topX, topY, width, height):
+    def get(x, y):
+        if 0 <= x < len(cells) and 0 <= y < len(cells[0]):
+            return cells[x][y]
+        return Wall()
+    return [[get(topX + i, topY + j) for j in range(height)] for i in range(width)]
+
+def ref_rotate_left(cells):
+    width, height = len(cells), len(cells[0])
+    return [[cells[width - 1 - j][i] for j in range(width)] for i in range(height)]
+
+def ref_process_vis(cells, agent_pos):
+    width, height = len(cells), len(cells[0])
+    mask = np.zeros(shape=(width, height), dtype=bool)
+    mask[agent_pos[0], agent_pos[1]] = True
+    for j in reversed(range(0, height)):
+        for i in range(0, width - 1):
+            if not mask[i, j]:
+                continue
+            if cells[i][j] and not cells[i][j].see_behind():
+                continue
+            mask[i + 1, j] = True
+            if j > 0:
+                mask[i + 1, j - 1] = True
+                mask[i, j - 1] = True
+        for i in reversed(range(1, width)):
+            if not mask[i, j]:
+                continue
+            if cells[i][j] and not cells[i][j].see_behind():
+                continue
+            mask[i - 1, j] = True
+            if j > 0:
+                mask[i - 1, j - 1] = True
+                mask[i, j - 1] = True
+    return mask
+
+def cell_code(v):
+    return Grid.EMPTY if v is None else tuple(v.encode())
+
+def check_cells(grid, cells):
+    # Same encoding in every cell, and the same instances of the objects
+    # which have an identity
+    assert (grid.width, grid.height) == (len(cells), len(cells[0]))
+    for i in range(grid.width):
+        for j in range(grid.height):
+            v = cells[i][j]
+            assert tuple(grid.array[i, j].tolist()) == cell_code(v)
+            if v is not None and type(v) not in PLAIN_OBJS:
+                assert grid.get(i, j) is v
+
+def random_grid(width, height):
+    makers = [
+        lambda: None,
+        lambda: None,
+        lambda: None,
+        lambda: Wall(),
+        lambda: Floor('red'),
+        lambda: Goal(),
+        lambda: Lava(),
+        lambda: Door('blue', is_open=True),
+        lambda: Door('yellow'),
+        lambda: Door('red', is_locked=True),
+        lambda: Key('yellow'),
+        lambda: Ball('purple'),
+        lambda: Box('green')
+    ]
+    grid = Grid(width, height)
+    for i in range(width):
+        for j in range(height):
+            grid.set(i, j, random.choice(makers)())
+    return grid
+
+# Grid operations should match the cell by cell algorithms they replace,
+# with and without precomputed visibility tables
+for width in [7, 13]:
+    for trial in range(0, 20):
+        height = width + random.randint(-2, 2)
+        grid = random_grid(width, height)
+        cells = grid_cells(grid)
+
+        topX = random.randint(-4, width)
+        topY = random.randint(-4, height)
+        w, h = random.randint(3, 9), random.randint(3, 9)
+        check_cells(grid.slice(topX, topY, w, h), ref_slice(cells, topX, topY, w, h))
+        check_cells(grid.rotate_left(), ref_rotate_left(cells))
+
+        vis_grid = grid.slice(0, 0, width, height)
+        agent_pos = (random.randrange(width), height - 1)
+        mask = vis_grid.process_vis(agent_pos)
+        ref_mask = ref_process_vis(cells, agent_pos)
+        assert np.array_equal(mask, ref_mask)
+        check_cells(vis_grid, [
+            [cells[i][j] if ref_mask[i, j] else None for j in range(height)]
+            for i in range(width)
+        ])
+
+        vis_mask = np.random.rand(width, height) < 0.5
+        array = grid.encode(vis_mask)
+        for i in range(width):
+            for j in range(height):
+                code = cell_code(cells[i][j]) if vis_mask[i, j] else (0, 0, 0)
+                assert tuple(array[i, j].tolist()) == code
+
+        # Decoding creates new objects, unless lazy
+        array = grid.encode()
+        for lazy in [False, True]:
+            decoded = Grid.decode(array, lazy=lazy)
+            assert np.array_equal(decoded.encode(), array)
+            if lazy:
+                assert len(decoded.objs) == 0
+            else:
+                assert set(decoded.objs) == set(grid.objs)
+                for pos, v in decoded.objs.items():
+                    assert v is not grid.objs[pos]
+
+        # The padded planes should follow changes to the grid
+        padded, pad = grid.padded(3)
+        assert np.array_equal(padded[pad:pad+width, pad:pad+height], grid.array)
+        assert (padded[:pad] == Grid.WALL).all()
+        assert (padded[:, -pad:] == Grid.WALL).all()
+        grid.set(0, 0, Key('red'))
+        assert tuple(padded[pad, pad].tolist()) == tuple(Key('red').encode())
+
+# Agent views should match slicing and rotating the grid
+for env_name in ['MiniGrid-KeyCorridorS3R3-v0', 'MiniGrid-ObstructedMaze-2Dlhb-v0']:
+    env = gym.make(env_name)
+    size = env.agent_view_size
+    for i in range(0, 200):
+        topX, topY, _, _ = env.get_view_exts()
+        cells = ref_slice(grid_cells(env.grid), topX, topY, size, size)
+        for k in range(env.agent_dir + 1):
+            cells = ref_rotate_left(cells)
+        check_cells(env.grid.view(env.agent_pos, env.agent_dir, size), cells)
+        _, _, done, _ = env.step(random.randint(0, 5))
+        if done:
+            env.reset()
+
+# Plain objects returned by get are shared and can't be modified, unlike
+# their copies
+grid = Grid(3, 3)
+grid.set(0, 0, Wall())
+wall = grid.get(0, 0)
+try:
+    wall.color = 'red'
+    assert False, "shared wall was modified"
+except AssertionError as e:
+    assert 'shared' in str(e)
+wall = copy.copy(wall)
+wall.color = 'red'
+grid.set(1, 1, wall)
+assert grid.get(1, 1).color == 'red' and grid.get(0, 0).color == 'grey'
+
 #############################################################################
+
+print('testing observation buffers')
+
+# Observations written into a buffer should match newly allocated ones
+env = gym.make('MiniGrid-DoorKey-8x8-v0')
+ref = gym.make('MiniGrid-DoorKey-8x8-v0')
+buffer = np.zeros((2,) + env.observation_space.spaces['image'].shape, dtype='uint8')
+env.set_obs_buffer(buffer[1])
+env.seed(1337)
+ref.seed(1337)
+obs = env.reset()
+ref.reset()
+for i in range(0, 500):
+    action = random.randint(0, env.action_space.n - 1)
+    buf_obs, _, done, _ = env.step(action)
+    ref_obs, _, _, _ = ref.step(action)
+    assert buf_obs is obs
+    assert np.array_equal(buffer[1], ref_obs['image'])
+    assert buf_obs['direction'] == ref_obs['direction']
+    if done:
+        env.reset()
+        ref.reset()
+assert not buffer[0].any()
+
+# Buffers should take the size of views changed by AgentViewWrapper
+env = AgentViewWrapper(gym.make('MiniGrid-DoorKey-8x8-v0'), agent_view_size=5)
+ref = AgentViewWrapper(gym.make('MiniGrid-DoorKey-8x8-v0'), agent_view_size=5)
+buffer = np.zeros(env.observation_space.spaces['image'].shape, dtype='uint8')
+env.unwrapped.set_obs_buffer(buffer)
+env.seed(1337)
+ref.seed(1337)
+env.reset()
+ref.reset()
+for i in range(0, 100):
+    action = random.randint(0, env.action_space.n - 1)
+    env.step(action)
+    ref_obs, _, done, _ = ref.step(action)
+    assert np.array_equal(buffer, ref_obs['image'])
+    if done:
+        env.reset()
+        ref.reset()
+
+print('testing lazy observations')
+
+# Lazy observations should match those generated on every step
+env = gym.make('MiniGrid-KeyCorridorS3R3-v0')
+ref = gym.make('MiniGrid-KeyCorridorS3R3-v0')
+env.set_obs_mode('lazy')
+env.seed(1337)
+ref.seed(1337)
+env.reset()
+ref.reset()
+for i in range(0, 500):
+    action = random.randint(0, env.action_space.n - 1)
+    lazy_obs, _, done, _ = env.step(action)
+    ref_obs, _, _, _ = ref.step(action)
+    if i % 2 == 0:
+        assert np.array_equal(lazy_obs['image'], ref_obs['image'])
+    if done:
+        env.reset()
+        ref.reset()
+
+# Pickled lazy observations should be plain dictionaries
+import pickle
+lazy_obs = pickle.loads(pickle.dumps(env.step(0)[0]))
+ref_obs = ref.step(0)[0]
+assert type(lazy_obs) is dict
+assert np.array_equal(lazy_obs['image'], ref_obs['image'])
+
+##############################################################################
+
+print('testing place_obj')
+from gym_minigrid.minigrid import Ball
+
+# Placing objects should fail when no empty cell is left
+for gen_version in [1, 2]:
+    env = gym.make('MiniGrid-Empty-6x6-v0')
+    env.gen_version = gen_version
+    env.seed(0)
+    env.reset()
+    for i in range(0, 10):
+        pos = env.place_obj(Ball(), reject_fn=lambda env, pos: pos[0] == 2)
+        assert pos[0] != 2
+    for i in range(0, 4):
+        pos = env.place_obj(Ball())
+        assert pos[0] == 2
+    try:
+        env.place_obj(Ball())
+        assert False
+    except RecursionError:
+        pass
+
+# Levels of version 2 generators should only depend on the seed
+env = gym.make('MiniGrid-ObstructedMaze-Full-v0')
+env.gen_version = 2
+levels = []
+for seed in [0, 1, 0, 1]:
+    env.seed(seed)
+    env.reset()
+    levels.append(str(env))
+    assert sorted(env.door_colors) == sorted(COLOR_NAMES)
+assert levels[0] == levels[2] and levels[1] == levels[3]
+
+##############################################################################
+
+print('testing get_state and set_state')
+
+# Restoring a snapshot should replay the same episode
+env = gym.make('MiniGrid-KeyCorridorS3R3-v0')
+env.reset()
+for i in range(0, 20):
+    for j in range(0, random.randint(0, 20)):
+        _, _, done, _ = env.step(random.randint(0, 5))
+        if done:
+            env.reset()
+    state = env.get_state()
+    actions = [random.randint(0, 5) for j in range(0, 50)]
+    runs = []
+    for run in range(0, 2):
+        env.set_state(state)
+        trajectory = []
+        for action in actions:
+            obs, reward, done, _ = env.step(action)
+            trajectory.append((obs['image'].tolist(), reward, done, str(env)))
+            if done:
+                env.reset()
+        runs.append(trajectory)
+    assert runs[0] == runs[1]
+
+# Restoring a snapshot into another instance should not share its grid
+clone = gym.make('MiniGrid-KeyCorridorS3R3-v0')
+clone.set_state(env.get_state())
+assert clone.grid is not env.grid and str(clone) == str(env)
+for i in range(0, 50):
+    action = random.randint(0, 5)
+    obs, _, done, _ = env.step(action)
+    clone_obs, _, _, _ = clone.step(action)
+    assert np.array_equal(obs['image'], clone_obs['image'])
+    assert str(clone) == str(env)
+    if done:
+        break
+
+##############################################################################
+
+print('testing LevelBank')
+import tempfile
+from gym_minigrid.levelbank import LevelBank
+from gym_minigrid.wrappers import LevelBankWrapper
+
+# Levels loaded from a bank should be those generated from the same seeds
+env_name = 'MiniGrid-KeyCorridorS3R3-v0'
+bank = LevelBank.generate(gym.make(env_name), range(10, 20), tempfile.mkdtemp())
+env = LevelBankWrapper(gym.make(env_name), bank)
+ref = gym.make(env_name)
+for seed in [12, 19, 7, 10, 12]:
+    env.seed(seed)
+    ref.seed(seed)
+    obs = env.reset()
+    ref_obs = ref.reset()
+    assert str(env.unwrapped) == str(ref)
+    assert obs['mission'] == ref_obs['mission']
+    for i in range(0, 50):
+        action = random.randint(0, 5)
+        obs, _, done, _ = env.step(action)
+        ref_obs, _, _, _ = ref.step(action)
+        assert np.array_equal(obs['image'], ref_obs['image'])
+        if done:
+            env.reset()
+            ref.reset()
+            assert str(env.unwrapped) == str(ref)
+
+# Cycling through a bank should give the levels of ReseedWrapper, including
+# for generators which avoid the starting position of the level before
+for env_name in [
+    'MiniGrid-Fetch-8x8-N3-v0',
+    'MiniGrid-GoToObject-8x8-N2-v0',
+    'MiniGrid-PutNear-8x8-N3-v0'
+]:
+    seeds = list(range(100, 140))
+    bank = LevelBank.generate(gym.make(env_name), seeds, tempfile.mkdtemp())
+    loads = []
+    load = bank.load
+    bank.load = lambda env, idx: loads.append(idx) or load(env, idx)
+    env = ReseedWrapper(LevelBankWrapper(gym.make(env_name), bank), seeds)
+    ref = ReseedWrapper(gym.make(env_name), seeds)
+    for i in range(0, 2 * len(seeds)):
+        obs = env.reset()
+        ref_obs = ref.reset()
+        assert str(env.unwrapped) == str(ref.unwrapped)
+        assert obs['mission'] == ref_obs['mission']
+    assert len(loads) >= len(seeds)
+
+##############################################################################
+
+print('testing PrefetchWrapper')
+import itertools
+
+# Prefetched levels should be those reset would have generated, including
+# for generators which avoid the starting position of the level before
+for processes, seeds, gen_version, env_name in itertools.product(
+    [False, True],
+    [None, [3, 1, 4, 1, 5] + list(range(100, 115))],
+    [1, 2],
+    [
+        'MiniGrid-KeyCorridorS3R3-v0',
+        'MiniGrid-Fetch-8x8-N3-v0',
+        'MiniGrid-GoToObject-8x8-N2-v0',
+        'MiniGrid-PutNear-8x8-N3-v0'
+    ]
+):
+    env = gym.make(env_name)
+    ref = gym.make(env_name)
+    env.gen_version = gen_version
+    ref.gen_version = gen_version
+    env = PrefetchWrapper(env, seeds=seeds, num_workers=2, processes=processes)
+    env.seed(1337)
+    ref.seed(1337)
+    for i in range(0, 40):
+        if seeds is not None:
+            ref.seed(seeds[i % len(seeds)])
+        elif i == 6:
+            # Drawing random numbers restarts the stream
+            env.unwrapped._rand_int(0, 10)
+            ref._rand_int(0, 10)
+        obs = env.reset()
+        ref_obs = ref.reset()
+        assert str(env.unwrapped) == str(ref)
+        assert np.array_equal(obs['image'], ref_obs['image'])
+    env.close()
+
+##############################################################################
+
+print('testing deferred reset')
+from gym_minigrid.minigrid import deferred_reset
+
+# Deferring the first reset should not change the levels generated
+for env_name in env_list:
+    ref = gym.make(env_name)
+    with deferred_reset():
+        env = gym.make(env_name)
+    assert env.observation_space == ref.observation_space
+    env.reset()
+    if env.unwrapped.init_seed is not None:
+        assert str(env.unwrapped) == str(ref.unwrapped)
+    env.seed(9)
+    ref.seed(9)
+    env.reset()
+    ref.reset()
+    assert str(env.unwrapped) == str(ref.unwrapped)
+
+# Environments constructed by other threads meanwhile should be reset
+import threading
+envs = []
+with deferred_reset():
+    thread = threading.Thread(target=lambda: envs.append(gym.make(env_name)))
+    thread.start()
+    thread.join()
+assert envs[0].unwrapped.np_random is not None
+assert hasattr(envs[0].unwrapped, 'grid')
+
+##############################################################################
+
+print('testing numpy rendering')
+
+# Frames rendered without Qt should show the agent in its cell
+for env_name in env_list:
+    env = gym.make(env_name)
+    frame = env.render('rgb_array', backend='numpy')
+    assert frame.shape == (env.height * 32, env.width * 32, 3)
+    assert frame.dtype == np.uint8
+    x, y = env.agent_pos
+    r, g, b = frame[y * 32 + 16, x * 32 + 16]
+    assert r == 255 and g < 128 and b < 128
+
+# Frames should not depend on which tiles are still cached
+from gym_minigrid.raster import TileAtlas, render_grid
+atlas = TileAtlas(max_tiles=4)
+env = gym.make('MiniGrid-KeyCorridorS3R3-v0')
+for i in range(0, 50):
+    _, _, done, _ = env.step(random.randint(0, 5))
+    if done:
+        env.reset()
+    frame = render_grid(env.grid, 16, env.agent_pos, env.agent_dir, atlas=atlas)
+    ref_frame = render_grid(env.grid, 16, env.agent_pos, env.agent_dir, atlas=TileAtlas())
+    assert np.array_equal(frame, ref_frame)
+assert len(atlas) == 4
+
+# Frames updated incrementally should match frames rendered from scratch
+env = gym.make('MiniGrid-MultiRoom-N6-v0')
+for i in range(0, 200):
+    _, _, done, _ = env.step(random.randint(0, 5))
+    if done:
+        env.reset()
+    frame = env.render('rgb_array', backend='numpy')
+    ref_frame = render_grid(
+        env.grid,
+        32,
+        env.agent_pos,
+        env.agent_dir,
+        env.gen_vis_mask(),
+        atlas=TileAtlas()
+    )
+    assert np.array_equal(frame, ref_frame)
+
+# Batched frames should match frames rendered one by one
+from gym_minigrid.raster import render_envs
+envs = [gym.make('MiniGrid-DoorKey-8x8-v0') for _ in range(0, 16)]
+for k, env in enumerate(envs):
+    env.seed(k)
+    env.reset()
+    for i in range(0, k):
+        env.step(random.randint(0, 2))
+frames = render_envs(envs, 8)
+assert frames.shape == (16, 64, 64, 3)
+for k, env in enumerate(envs):
+    ref_frame = render_grid(env.grid, 8, env.agent_pos, env.agent_dir, env.gen_vis_mask())
+    assert np.array_equal(frames[k], ref_frame)
+
+# Batched partial views should match views rendered one by one
+from gym_minigrid.raster import render_obs
+images = np.stack([env.gen_obs()['image'] for env in envs])
+frames = render_obs(images, 8)
+assert frames.shape == (16, 56, 56, 3)
+for k in range(0, 16):
+    assert np.array_equal(frames[k], render_obs(images[k], 8))
+
+##############################################################################
+
+print('testing Renderer arrays')
+from gym_minigrid.rendering import Renderer
+
+# Arrays should view the image, whose rows are padded to 4 bytes
+r = Renderer(37, 5)
+r.beginFrame()
+r.fillRect(3, 1, 10, 2, 10, 200, 30)
+r.endFrame()
+frame = r.getArray()
+assert frame.shape == (5, 37, 3)
+assert (frame[1:3, 3:13] == (10, 200, 30)).all()
+assert frame[1:3].sum() == 10 * 2 * 240 and frame[0].sum() == 0
+out = np.zeros_like(frame)
+assert r.getArray(out) is out and np.array_equal(out, frame)
+r.beginFrame()
+r.endFrame()
+assert not frame.any()
+
+##############################################################################
+
+print('testing RecorderWrapper')
+import os
+import glob
+from gym_minigrid.recorder import load_chunk
+
+# Recorded frames should be those of the episodes played
+for format, encoded in [('y4m', False), ('npz', False), ('npz', True)]:
+    directory = tempfile.mkdtemp()
+    env = RecorderWrapper(
+        gym.make('MiniGrid-DoorKey-6x6-v0'),
+        directory,
+        format=format,
+        encoded=encoded,
+        tile_size=8,
+        chunk_size=16
+    )
+    frames = []
+    for i in range(0, 2):
+        env.reset()
+        for j in range(0, 21):
+            if j > 0:
+                env.step(env.action_space.sample())
+            ref = env.unwrapped
+            frames.append(render_grid(
+                ref.grid,
+                8,
+                ref.agent_pos,
+                ref.agent_dir,
+                ref.gen_vis_mask()
+            ))
+    env.close()
+
+    if format == 'y4m':
+        with open(os.path.join(directory, 'episode_000001.y4m'), 'rb') as f:
+            header, data = f.read().split(b'\n', 1)
+        assert header.startswith(b'YUV4MPEG2 W48 H48 ')
+        assert len(data) == 21 * (len(b'FRAME\n') + 48 * 48 * 3)
+    else:
+        paths = sorted(glob.glob(os.path.join(directory, 'episode_*.npz')))
+        assert len(paths) == 4
+        recorded = np.concatenate([load_chunk(path, 8) for path in paths])
+        assert np.array_equal(recorded, np.stack(frames))
+
+##############################################################################
+
+print('testing EnvPool')
+from gym_minigrid.pool import EnvPool
+
+# Pooled instances should generate the same levels as new ones
+pool = EnvPool(max_free=2, obs_buffers=True)
+for env_name in ['MiniGrid-DoorKey-8x8-v0', 'MiniGrid-KeyCorridorS3R3-v0']:
+    for i in range(0, 2):
+        envs = []
+        for seed in range(0, 4):
+            env, obs = pool.checkout(env_name, seed=seed)
+            ref = gym.make(env_name)
+            ref.seed(seed)
+            ref_obs = ref.reset()
+            assert str(env.unwrapped) == str(ref.unwrapped)
+            assert np.array_equal(obs['image'], ref_obs['image'])
+            envs.append(env)
+        for env in envs:
+            pool.release(env)
+assert pool.hits == 4 and pool.misses == 12
+assert pool.num_live == 0 and pool.num_free == 4
+pool.close()
+
+##############################################################################
+
+print('testing VecMiniGrid')
+from gym_minigrid.vecenv import VecMiniGrid
+
+# The batched environment should match environments stepped one by one
+for env_name in ['MiniGrid-DoorKey-6x6-v0', 'MiniGrid-LavaCrossingS9N2-v0']:
+    envs = [gym.make(env_name) for _ in range(4)]
+    refs = [gym.make(env_name) for _ in range(4)]
+    for i in range(4):
+        envs[i].seed(1337 + i)
+        refs[i].seed(1337 + i)
+
+    vec_env = VecMiniGrid(envs)
+    vec_env.reset()
+    for ref in refs:
+        ref.reset()
+
+    for i in range(0, 500):
+        actions = [random.randint(0, 5) for _ in range(4)]
+        obs, reward, done, _ = vec_env.step(actions)
+        for k, ref in enumerate(refs):
+            ref_obs, ref_reward, ref_done, _ = ref.step(actions[k])
+            if ref_done:
+                ref_obs = ref.reset()
+            assert np.array_equal(obs['image'][k], ref_obs['image'])
+            assert reward[k] == ref_reward
+            assert done[k] == ref_done
+
+        # Rendered frames should match those of the environments
+        if i % 50 == 0:
+            frames = vec_env.render(tile_size=8)
+            for k, ref in enumerate(refs):
+                ref_frame = render_grid(
+                    ref.grid,
+                    8,
+                    ref.agent_pos,
+                    ref.agent_dir,
+                    ref.gen_vis_mask()
+                )
+                assert np.array_equal(frames[k], ref_frame)
+
+##############################################################################
+
+print('testing SubprocVecMiniGrid')
+from gym_minigrid.vecenv import SubprocVecMiniGrid
+
+# Workers should match environments stepped one by one, whether they write
+# images into shared memory (unwrapped) or copy them there (wrapped)
+for env_name in ['MiniGrid-DoorKey-6x6-v0', 'MiniGrid-Fetch-8x8-N3-v0']:
+    env_fns = [
+        lambda: gym.make(env_name),
+        lambda: gym.core.Wrapper(gym.make(env_name))
+    ] * 2
+    refs = [fn() for fn in env_fns]
+
+    vec_env = SubprocVecMiniGrid(env_fns, num_workers=2)
+    vec_env.seed([1337 + i for i in range(4)])
+    for i, ref in enumerate(refs):
+        ref.seed(1337 + i)
+
+    obs = vec_env.reset()
+    ref_obs = [ref.reset() for ref in refs]
+    for i in range(0, 300):
+        for k in range(4):
+            assert np.array_equal(obs['image'][k], ref_obs[k]['image'])
+            assert obs['direction'][k] == ref_obs[k]['direction']
+            assert obs['mission'][k] == ref_obs[k]['mission']
+
+        actions = [random.randint(0, 6) for _ in range(4)]
+        obs, reward, done, _ = vec_env.step(actions)
+        for k, ref in enumerate(refs):
+            ref_obs[k], ref_reward, ref_done, _ = ref.step(actions[k])
+            if ref_done:
+                ref_obs[k] = ref.reset()
+            assert reward[k] == ref_reward
+            assert done[k] == ref_done
+    vec_env.close()